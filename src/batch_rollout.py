@@ -0,0 +1,90 @@
+import numpy as np
+from p2_t3 import won_boards, full_boards, NO_CONSTRAINT
+
+# Per 9-bit board mask: is it won / full, how many squares are set, and the
+# index of its k-th set square (-1 past the last one).
+WON = np.array(won_boards, dtype=bool)
+FULL = np.array(full_boards, dtype=bool)
+POPCOUNT = np.array([bin(mask).count('1') for mask in range(512)], dtype=np.int64)
+NTH_BIT = np.array([
+    [i for i in range(9) if mask & (1 << i)] + [-1] * (9 - bin(mask).count('1'))
+    for mask in range(512)
+], dtype=np.int64)
+
+BITS = (1 << np.arange(9)).astype(np.uint16)
+EMPTY = np.uint16(0x1ff)
+
+default_rng = np.random.default_rng()
+
+
+def batch_rollout(state, n, rng=None):
+    """ Plays n independent random games from the same state in lockstep and returns who won each of them.
+
+    Args:
+        state:  The state of the game, as a p2_t3.Board tuple.
+        n:      The number of games to play.
+        rng:    The numpy Generator used to pick the moves, default_rng if not given.
+
+    Returns:    An int8 array of length n holding 1 or 2 for the winning player of each game, or 0 for a draw.
+
+    """
+    if rng is None:
+        rng = default_rng
+
+    # Only the games that are still running are kept; ids maps them back to their slot in winners.
+    ids = np.arange(n)
+    winners = np.zeros(n, dtype=np.int8)
+
+    pieces = np.empty((n, 2, 9), dtype=np.uint16)
+    pieces[:, 0, :] = state[0:18:2]
+    pieces[:, 1, :] = state[1:18:2]
+    macro = np.empty((n, 2), dtype=np.uint16)
+    macro[:] = state[18:20]
+    constraint = np.full(n, NO_CONSTRAINT if state[20] is None else 3 * state[20] + state[21], dtype=np.int64)
+    player = np.full(n, state[22] - 1, dtype=np.int64)
+
+    rows = np.arange(n)
+    while True:
+        # Retire the games that have ended.
+        p1, p2 = macro[:, 0], macro[:, 1]
+        won1, won2 = WON[p1 & ~p2], WON[p2 & ~p1]
+        ended = won1 | won2 | FULL[p1 | p2]
+        if ended.any():
+            winners[ids[ended]] = np.where(won1[ended], 1, np.where(won2[ended], 2, 0))
+            running = ~ended
+            ids, pieces, macro = ids[running], pieces[running], macro[running]
+            constraint, player = constraint[running], player[running]
+            rows = rows[:len(ids)]
+            if not len(ids):
+                return winners
+
+        # Empty squares of every sub-board the constraint lets us play in.
+        finished = macro[:, 0] | macro[:, 1]
+        playable = (finished[:, None] & BITS) == 0
+        playable &= (constraint[:, None] == np.arange(9)) | (constraint == NO_CONSTRAINT)[:, None]
+        legal = np.where(playable, ~(pieces[:, 0, :] | pieces[:, 1, :]) & EMPTY, 0)
+
+        # Pick a uniformly random legal move per game: first the sub-board holding the k-th move, then the square.
+        counts = POPCOUNT[legal]
+        totals = counts.cumsum(axis=1)
+        k = (rng.random(len(ids)) * totals[:, -1]).astype(np.int64)
+        board = (totals <= k[:, None]).sum(axis=1)
+        k -= totals[rows, board] - counts[rows, board]
+        cell = NTH_BIT[legal[rows, board], k]
+
+        # Play it.
+        pieces[rows, player, board] |= BITS[cell]
+        mine = pieces[rows, player, board]
+        won = WON[mine]
+        full = ~won & FULL[pieces[rows, 0, board] | pieces[rows, 1, board]]
+        macro[rows, player] |= np.where(won, BITS[board], 0).astype(np.uint16)
+        macro[full] |= BITS[board[full]][:, None]
+
+        finished = macro[:, 0] | macro[:, 1]
+        constraint = np.where(finished & BITS[cell], NO_CONSTRAINT, cell)
+        player ^= 1
+
+
+def count_wins(state, player, n, rng=None):
+    """ Returns how many of n random games from state are won by player. """
+    return int(np.count_nonzero(batch_rollout(state, n, rng) == player))
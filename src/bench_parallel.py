@@ -0,0 +1,69 @@
+""" Compares single-threaded, root-parallel and tree-parallel search in mcts_vanilla.
+
+Every mode gets the same total number of playouts per move. Playouts/sec is measured on the opening move, and playing
+strength as the score of each parallel mode against the single-threaded search, alternating colors.
+
+Usage: python bench_parallel.py [workers] [games] [playouts]
+"""
+import sys
+from timeit import default_timer as time
+import p2_t3
+import mcts_parallel
+import mcts_vanilla
+
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else mcts_parallel.workers
+games = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+playouts = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+# name -> (num_nodes, num_searches, tree_workers, tree_backend) of mcts_vanilla's engine
+modes = dict(
+    single=(playouts, 1, 1, 'thread'),
+    root=(playouts // workers, workers, 1, 'thread'),
+    tree_thread=(playouts, 1, workers, 'thread'),
+    tree_process=(playouts, 1, workers, 'process'),
+)
+
+
+def player(mode):
+    def think(board, state):
+        engine = mcts_vanilla.engine
+        engine.num_nodes, engine.num_searches, engine.tree_workers, engine.tree_backend = modes[mode]
+        return mcts_vanilla.think(board, state)
+    return think
+
+
+def play(board, player1, player2):
+    state = board.starting_state()
+    current_player, other_player = player1, player2
+    while not board.is_ended(state):
+        state = board.next_state(state, current_player(board, state))
+        current_player, other_player = other_player, current_player
+    return board.points_values(state)
+
+
+board = p2_t3.Board()
+mcts_parallel.workers = workers
+print("%d workers, %d playouts per move, %d games per mode" % (workers, playouts, games))
+print("%-14s %14s %10s" % ("mode", "playouts/sec", "score"))
+
+for mode in modes:
+    think = player(mode)
+    think(board, board.starting_state())    # Warm up the process pool.
+    start = time()
+    for _ in range(3):
+        think(board, board.starting_state())
+    rate = 3 * playouts / (time() - start)
+
+    # The score against single-threaded search is 1 per win and 0.5 per draw.
+    score = 0.5
+    if mode != 'single':
+        baseline = player('single')
+        score = 0.
+        for game in range(games):
+            if game % 2 == 0:
+                score += (play(board, think, baseline)[1] + 1) / 2.
+            else:
+                score += (play(board, baseline, think)[2] + 1) / 2.
+        score /= games
+
+    print("%-14s %14.0f %10.2f" % (mode, rate, score))
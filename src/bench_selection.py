@@ -0,0 +1,72 @@
+""" Micro-benchmark of the cost of picking the UCT child of one node, for nodes of different widths.
+
+closure:        the original selection, rebuilding a scoring closure and taking log(parent.visits) for every child.
+cached_log:     mcts_engine.uct, the current MCTSNode selection, with log(parent.visits) taken once.
+arena_loop:     NodeArena.best_child scoring the children from contiguous array slices.
+arena_numpy:    NodeArena.best_child scoring all children at once with NumPy.
+
+Usage: python bench_selection.py [repeats]
+"""
+import random
+import sys
+from math import sqrt, log
+from timeit import timeit
+import mcts_arena
+import mcts_engine
+from mcts_node import MCTSNode
+
+explore_faction = 2.
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+
+def closure(leaf_node):
+    def calculate_score(i):
+        return (i.wins / i.visits) + (explore_faction * sqrt(log(i.parent.visits) / i.visits))
+
+    best_score = 0
+    for i in leaf_node.child_nodes.values():
+        if leaf_node.visits != 0:
+            current_score = calculate_score(i)
+        else:
+            current_score = 0
+        if current_score >= best_score:
+            best_score = current_score
+            leaf_node = i
+    return leaf_node
+
+
+def make_trees(width):
+    """ Builds the same node with width children as an MCTSNode and in a NodeArena. """
+    stats = []
+    for _ in range(width):
+        visits = random.randint(1, 100)
+        stats.append((random.randint(0, visits), visits))
+
+    root = MCTSNode()
+    root.visits = sum(visits for wins, visits in stats)
+    for action, (wins, visits) in enumerate(stats):
+        child = MCTSNode(parent=root, parent_action=action)
+        child.wins, child.visits = wins, visits
+        root.child_nodes[action] = child
+
+    arena = mcts_arena.NodeArena()
+    arena.visits[0] = root.visits
+    arena.first_child[0], arena.child_count[0], arena.size = 1, width, width + 1
+    for child, (wins, visits) in enumerate(stats, 1):
+        arena.wins[child], arena.visits[child] = wins, visits
+    return root, arena
+
+
+print("%6s %12s %12s %12s %12s   (usec per node)" % ("width", "closure", "cached_log", "arena_loop", "arena_numpy"))
+for width in (3, 9, 27, 81):
+    root, arena = make_trees(width)
+    times = [
+        timeit(lambda: closure(root), number=repeats),
+        timeit(lambda: mcts_engine.uct(root, explore_faction), number=repeats),
+    ]
+    mcts_arena.vectorize_width = width + 1
+    times.append(timeit(lambda: arena.best_child(0, explore_faction), number=repeats))
+    if mcts_arena.np is not None:
+        mcts_arena.vectorize_width = 0
+        times.append(timeit(lambda: arena.best_child(0, explore_faction), number=repeats))
+    print("%6d" % width + "".join(" %12.2f" % (1e6 * t / repeats) for t in times))
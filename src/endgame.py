@@ -0,0 +1,106 @@
+from time import time
+from p2_t3 import move_actions, iter_moves
+
+# Kinds of cache entries: the exact value, or a lower or upper bound found by a cut-off search.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchLimitReached(Exception):
+    """ Raised inside EndgameSolver.solve when a position needs more than max_positions nodes, or its deadline
+    passes.
+    """
+
+
+class EndgameSolver(object):
+    """ An exact solver for positions near the end of the game: a negamax alpha-beta search over the values 1 (win),
+    0 (draw) and -1 (loss) of the player to move, with a cache of solved positions keyed by their Zobrist hash
+    (Board.hash).
+
+    It only takes positions with at most threshold open cells (empty squares of unfinished sub-boards, however the
+    next move is constrained), which bounds the depth of the search. The cache is kept between solves, as values do
+    not depend on who is searching.
+
+    """
+    def __init__(self, threshold=10, max_positions=20000, cache_size=500000):
+        """
+        Args:
+            threshold:      The most open cells a position may have to be solved.
+            max_positions:  Positions searched per solve before giving up, so a slow solve cannot eat a move's time.
+            cache_size:     Entries in the cache; it is cleared when it fills up.
+
+        """
+        self.threshold = threshold
+        self.max_positions = max_positions
+        self.cache_size = cache_size
+        self.cache = {}         # Hash -> (EXACT, LOWER or UPPER, value)
+        self.positions = 0      # Positions searched by the current solve
+        self.deadline = None    # Time by which the current solve must end, or None
+        self.solved = 0         # Successful solves
+        self.abandoned = 0      # Solves that reached max_positions
+
+    def applies(self, board, state):
+        """ Whether state is close enough to the end to be solved. """
+        return board.open_cells_mask(state).bit_count() <= self.threshold
+
+    def solve(self, board, state, deadline=None):
+        """ Returns the exact value of state for the player to move (1, 0 or -1), or None if solving it needs more
+        than max_positions positions or takes until deadline (a time.time() value), when set.
+        """
+        self.positions = 0
+        self.deadline = deadline
+        try:
+            value = self.negamax(board, state, board.hash(state), -1, 1)
+        except SearchLimitReached:
+            self.abandoned += 1
+            return None
+        self.solved += 1
+        return value
+
+    def negamax(self, board, state, h, alpha, beta):
+        """ Returns the value of state for the player to move, exact if it lies between alpha and beta and otherwise
+        a bound beyond them.
+        """
+        if board.is_ended(state):
+            return board.points_values(state)[board.current_player(state)]
+
+        entry = self.cache.get(h)
+        if entry is not None:
+            kind, value = entry
+            if kind == EXACT:
+                return value
+            if kind == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        self.positions += 1
+        if self.positions > self.max_positions:
+            raise SearchLimitReached()
+        # the clock is only read every 256 positions
+        if self.deadline is not None and not self.positions & 255 and time() > self.deadline:
+            raise SearchLimitReached()
+
+        original_alpha = alpha
+        best = -1
+        for move in iter_moves(board.legal_moves_mask(state)):
+            next_state, next_h = board.next_state_hashed(state, move_actions[move], h)
+            value = -self.negamax(board, next_state, next_h, -beta, -alpha)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            kind = UPPER
+        elif best >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[h] = (kind, best)
+        return best
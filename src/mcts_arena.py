@@ -0,0 +1,214 @@
+from array import array
+from math import sqrt, log
+import random
+from mcts_node import MCTSNode
+from p2_t3 import move_actions, iter_moves
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Nodes with at least this many children are scored all at once with NumPy (when it is installed).
+vectorize_width = 64
+
+
+class NodeArena(object):
+    """ A search tree stored as parallel arrays (one entry per node) instead of one MCTSNode object per node.
+
+    Node 0 is the root. The children of a node are allocated side by side the first time the node is expanded, and a
+    child's visit count stays 0 until it is first tried, which plays the role of MCTSNode.untried_actions. Visits are
+    added while descending and wins during backup, so a partly finished iteration already counts as a loss; several
+    workers sharing one tree use this as their virtual loss.
+
+    """
+    def __init__(self, capacity=1024):
+        self.capacity = 0
+        self.parent = array('i')        # Parent node index, -1 for the root
+        self.action = array('b')        # Index into p2_t3.move_actions of the move into this node, -1 for the root
+        self.wins = array('i')
+        self.visits = array('i')
+        self.first_child = array('i')
+        self.child_count = array('b')   # -1 until the node is expanded
+        self.grow(capacity)
+
+        self.size = 1
+        self.parent[0] = -1
+        self.action[0] = -1
+        self.child_count[0] = -1
+
+    def grow(self, capacity):
+        """ Extends every column to hold capacity nodes. Returns False if the arena cannot grow. """
+        for column in (self.parent, self.action, self.wins, self.visits, self.first_child, self.child_count):
+            column.frombytes(bytes(column.itemsize * (capacity - self.capacity)))
+        self.capacity = capacity
+        return True
+
+    def expand(self, node, board, state):
+        """ Allocates every child of node, doubling the arena if needed. Returns False if there is no room for them.
+
+        Args:
+            node:   The index of the node to expand.
+            board:  The game setup.
+            state:  The state of the game at node.
+
+        """
+        moves = list(iter_moves(board.legal_moves_mask(state)))
+        first = self.size
+        if first + len(moves) > self.capacity and not self.grow(max(2 * self.capacity, first + len(moves))):
+            return False
+
+        for child, move in enumerate(moves, first):
+            self.parent[child] = node
+            self.action[child] = move
+            self.wins[child] = 0
+            self.visits[child] = 0
+            self.child_count[child] = -1
+        self.first_child[node] = first
+        self.child_count[node] = len(moves)
+        self.size = first + len(moves)
+        return True
+
+    def select(self, board, state, explore_faction, rng=random):
+        """ Descends by UCT to a newly tried child (or a terminal node), adding a visit to every node on the way.
+
+        Args:
+            board:              The game setup.
+            state:              The state of the game at the root.
+            explore_faction:    The exploration constant of the UCT score.
+            rng:                The source of random numbers for picking among untried children.
+
+        Returns:                The index of the selected node and its state.
+
+        """
+        node = 0
+        self.visits[node] += 1
+        while self.child_count[node] >= 0 or self.expand(node, board, state):
+            first = self.first_child[node]
+            children = range(first, first + self.child_count[node])
+            if not children:
+                break
+
+            untried = [child for child in children if self.visits[child] == 0]
+            if untried:
+                node = untried[rng.randrange(len(untried))]
+            else:
+                node = self.best_child(node, explore_faction)
+
+            self.visits[node] += 1
+            state = board.next_state(state, move_actions[self.action[node]])
+            if untried:
+                break
+
+        return node, state
+
+    def best_child(self, node, explore_faction):
+        """ Returns the (fully tried) child of node with the highest UCT score, the last one on ties.
+
+        The log of the node's visits is taken once, and the scores are computed straight from the contiguous wins and
+        visits of the children.
+
+        """
+        first = self.first_child[node]
+        end = first + self.child_count[node]
+        log_visits = log(self.visits[node])
+
+        if np is not None and end - first >= vectorize_width:
+            offset = first * np.dtype(np.intc).itemsize
+            wins = np.frombuffer(self.wins, dtype=np.intc, count=end - first, offset=offset)
+            visits = np.frombuffer(self.visits, dtype=np.intc, count=end - first, offset=offset)
+            scores = wins / visits + explore_faction * np.sqrt(log_visits / visits)
+            return end - 1 - int(np.argmax(scores[::-1]))
+
+        best_score = 0
+        for child, wins, visits in zip(range(first, end), self.wins[first:end], self.visits[first:end]):
+            current_score = wins / visits + explore_faction * sqrt(log_visits / visits)
+            if current_score >= best_score:
+                best_score = current_score
+                node = child
+        return node
+
+    def backup(self, node, won):
+        """ Adds a win to every node from node up to the root; the visits were already added by select. """
+        if won:
+            while node != -1:
+                self.wins[node] += 1
+                node = self.parent[node]
+
+    def node(self, index):
+        """ Returns an MCTSNode-like view of a node. """
+        return ArenaNode(self, index)
+
+
+class ArenaNode(object):
+    """ A view of one NodeArena node with the attributes of an MCTSNode, so that code walking MCTSNode trees (such as
+    tree_to_string or picking the best root child) also works on an arena.
+    """
+    __slots__ = ('arena', 'index')
+    proven = None   # Arena searches do not prove results
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def parent(self):
+        parent = self.arena.parent[self.index]
+        return None if parent == -1 else ArenaNode(self.arena, parent)
+
+    @property
+    def parent_action(self):
+        action = self.arena.action[self.index]
+        return None if action == -1 else move_actions[action]
+
+    @property
+    def wins(self):
+        return self.arena.wins[self.index]
+
+    @property
+    def visits(self):
+        return self.arena.visits[self.index]
+
+    def _children(self):
+        first, count = self.arena.first_child[self.index], self.arena.child_count[self.index]
+        return range(first, first + max(count, 0))
+
+    @property
+    def child_nodes(self):
+        return dict((move_actions[self.arena.action[child]], ArenaNode(self.arena, child))
+                    for child in self._children() if self.arena.visits[child])
+
+    @property
+    def untried_actions(self):
+        return [move_actions[self.arena.action[child]]
+                for child in self._children() if not self.arena.visits[child]]
+
+    __repr__ = MCTSNode.__repr__
+    tree_to_string = MCTSNode.tree_to_string
+
+
+def search(board, state, keep_searching, explore_faction, rollout, rng=random):
+    """ Performs MCTS on a NodeArena.
+
+    Args:
+        board:              The game setup.
+        state:              The state of the game.
+        keep_searching:     Given the number of iterations done so far, whether to run another one.
+        explore_faction:    The exploration constant of the UCT score.
+        rollout:            The rollout function, returning the end state of a game played out from a state.
+        rng:                The source of random numbers, for the rollouts and the tree.
+
+    Returns:                The root node of the game tree, as an ArenaNode, and the number of iterations.
+
+    """
+    identity_of_bot = board.current_player(state)
+    arena = NodeArena()
+
+    iterations = 0
+    while keep_searching(iterations):
+        iterations += 1
+        leaf, leaf_state = arena.select(board, state, explore_faction, rng)
+        result_state = rollout(board, leaf_state, rng)
+        arena.backup(leaf, board.points_values(result_state)[identity_of_bot] > 0)
+
+    return arena.node(0), iterations
@@ -0,0 +1,620 @@
+from timeit import default_timer as time
+import random
+from math import sqrt, log
+from endgame import EndgameSolver
+from mcts_node import NodePool, peak_memory_kb
+from mcts_stats import SearchStats
+from p2_t3 import positions, move_actions, random_move
+import mcts_arena
+import mcts_profile
+import mcts_parallel
+import mcts_transposition
+from rollout_rng import RolloutRNG
+
+
+def random_rollout(board, state, rng=random):
+    """ Given the state of the game, the rollout plays out the remainder randomly.
+
+    Args:
+        board:  The game setup.
+        state:  The state of the game.
+        rng:    The source of random numbers: the random module or a rollout_rng.RolloutRNG.
+
+    Returns:    The end state of the game.
+
+    """
+    curr_state = state
+    while not board.is_ended(curr_state):
+        random_action = move_actions[random_move(board.legal_moves_mask(curr_state), rng)]
+        curr_state = board.next_state(curr_state, random_action)
+
+    return curr_state
+
+
+# The corner and center squares of a sub-board, and of every sub-board as a move mask.
+preferred_cells = (positions[(0, 0)] | positions[(0, 2)] | positions[(1, 1)] |
+                   positions[(2, 0)] | positions[(2, 2)])
+preferred_moves = sum(preferred_cells << (9 * x) for x in range(9))
+
+
+def heuristic_move(mask, rng=random):
+    """ Move policy of heuristic_rollout: 40% of the time the first legal corner or center move if there is one,
+    otherwise a uniformly random legal move.
+
+    Args:
+        mask:   A non-empty p2_t3 legal move mask.
+        rng:    The source of random numbers.
+
+    Returns:    The bit index of the move.
+
+    """
+    if rng.random() < 0.4:
+        preferred = mask & preferred_moves
+        if preferred:
+            return (preferred & -preferred).bit_length() - 1
+    return random_move(mask, rng)
+
+
+def heuristic_rollout(board, state, rng=random):
+    """ Plays out the remainder like random_rollout, except that 40% of the time it first looks for a legal move to a
+    corner or center square (see heuristic_move).
+
+    Args:
+        board:  The game setup.
+        state:  The state of the game.
+        rng:    The source of random numbers.
+
+    Returns:    The end state of the game.
+
+    """
+    curr_state = state
+    while not board.is_ended(curr_state):
+        action = move_actions[heuristic_move(board.legal_moves_mask(curr_state), rng)]
+        curr_state = board.next_state(curr_state, action)
+
+    return curr_state
+
+
+def uct(node, explore_faction):
+    """ Selection policy: the child with the highest UCT score, the last one on ties. The log of the node's visits is
+    taken once for all its children. Children proven to be won or lost are skipped: under a node that is not proven
+    itself, they can only be losses for the player to move (see MCTSEngine.propagate_proven).
+
+    Args:
+        node:               A fully expanded MCTSNode.
+        explore_faction:    The exploration constant.
+
+    Returns:                The action and child node selected.
+
+    """
+    log_visits = log(node.visits)
+    best_score = 0
+
+    for action, child in node.child_nodes.items():
+        if child.proven:
+            continue
+        current_score = (child.wins / child.visits) + (explore_faction * sqrt(log_visits / child.visits))
+
+        if current_score >= best_score:
+            best_score = current_score
+            best_action, best_child = action, child
+
+    return best_action, best_child
+
+
+def best_win_rate(stats):
+    """ Final-move policy: the action with the best win rate, the first one on ties.
+
+    Args:
+        stats:  An action -> (wins, visits) dictionary of the root's children.
+
+    Returns:    The action to be taken.
+
+    """
+    # helper for finding win rate
+    def action_winrate(action):
+        wins, visits = stats[action]
+        return wins/visits
+
+    # determine the best action by win rate (win/visits)
+    best_action = list(stats.keys())[0]
+    best_win_rate = action_winrate(best_action)
+
+    for action in stats:
+        new_win_rate = action_winrate(action)
+
+        if new_win_rate > best_win_rate:
+            best_win_rate = new_win_rate
+            best_action = action
+
+    return best_action
+
+
+def most_visits(stats):
+    """ Final-move policy: the most visited action, the first one on ties. """
+    return max(stats, key=lambda action: stats[action][1])
+
+
+class MCTSEngine(object):
+    def __init__(self, num_nodes=1000, time_limit=None, rollout=random_rollout, selection=uct,
+                 final_move=best_win_rate, explore_faction=2., label=None, reuse_tree=False, num_searches=1,
+                 tree_workers=1, tree_backend='thread', leaf_playouts=1, leaf_engine='batch', use_arena=False,
+                 transposition_size=0, max_nodes=0, prune_fraction=0.25, seed=None,
+                 endgame_threshold=0, endgame_positions=20000, early_stop=False, early_stop_z=2.,
+                 early_stop_interval=100, stats_hook=None):
+        """ A configurable MCTS bot. Its think method is the bot's think function.
+
+        Args:
+            num_nodes:          Iterations per move, or None for no limit.
+            time_limit:         Seconds per move, or None for no limit. The search stops at whichever limit comes
+                                first.
+            rollout:            Rollout policy: (board, state, rng) -> the end state of a game played out from
+                                state, drawing its random numbers from rng.
+            selection:          Selection policy: (node, explore_faction) -> the (action, child) to descend to.
+            final_move:         Final-move policy: the action to play, given the root's action -> (wins, visits).
+            explore_faction:    The exploration constant of the selection policy.
+            label:              If set, "<label> Tree Size: <iterations>" is printed after every search.
+            reuse_tree:         Keep the tree from one move to the next (see reuse).
+            num_searches:       Independent root-parallel searches per move; more than 1 runs them in
+                                mcts_parallel's pool.
+            tree_workers:       Workers sharing one tree (tree-parallel search); takes precedence over num_searches.
+            tree_backend:       'thread' or 'process', for tree_workers.
+            leaf_playouts:      Playouts per expanded leaf; more than 1 runs them as one batch on leaf_engine.
+            leaf_engine:        'batch' for batch_rollout's uniformly random games, 'pool' for the rollout policy in
+                                mcts_parallel's pool.
+            use_arena:          Store the tree in an mcts_arena.NodeArena instead of MCTSNode objects (one playout
+                                per leaf, UCT selection).
+            transposition_size: Share nodes between move orders through a transposition table of this many entries
+                                per player, kept between moves; 0 is off.
+            max_nodes:          Node budget of the tree, 0 for no limit; past it the least-visited leaves are pruned.
+                                Only MCTSNode trees use it, so it cannot be combined with use_arena,
+                                transposition_size or tree_workers.
+            prune_fraction:     Share of the budget freed by each pruning.
+            seed:               Seed of the engine's rollout_rng.RolloutRNG, which drives the rollouts, the choice of
+                                leaves to expand and the seeds of parallel workers; None seeds from the operating
+                                system. With a seed and a node budget, a single-process engine replays the same
+                                searches.
+            endgame_threshold:  Solve new leaves with at most this many open cells exactly with an
+                                endgame.EndgameSolver, and back up the exact result instead of playing out; 0 is off.
+                                Only MCTSNode trees use it.
+            endgame_positions:  Positions the solver may search per leaf before falling back on playouts.
+            early_stop:         End a search before its budget once the move is settled (see settled). Only
+                                single MCTSNode searches stop early.
+            early_stop_z:       The half-width of the win rate confidence intervals of settled, in units of the largest
+                                standard error a win rate over n playouts can have, 0.5 / sqrt(n).
+            early_stop_interval: Iterations between two checks of settled.
+            stats_hook:         If set, called by think with the mcts_stats.SearchStats of every move.
+
+        """
+        if max_nodes and (use_arena or transposition_size or tree_workers > 1):
+            raise ValueError("max_nodes only applies to MCTSNode trees, not to use_arena, transposition_size or "
+                             "tree_workers")
+        self.num_nodes = num_nodes
+        self.time_limit = time_limit
+        self.rollout = rollout
+        self.selection = selection
+        self.final_move = final_move
+        self.explore_faction = explore_faction
+        self.label = label
+        self.reuse_tree = reuse_tree
+        self.num_searches = num_searches
+        self.tree_workers = tree_workers
+        self.tree_backend = tree_backend
+        self.leaf_playouts = leaf_playouts
+        self.leaf_engine = leaf_engine
+        self.use_arena = use_arena
+        self.transposition_size = transposition_size
+        self.max_nodes = max_nodes
+        self.prune_fraction = prune_fraction
+        self.rng = RolloutRNG(seed)
+        self.early_stop = early_stop
+        self.early_stop_z = early_stop_z
+        self.early_stop_interval = early_stop_interval
+        self.endgame = EndgameSolver(endgame_threshold, endgame_positions) if endgame_threshold else None
+        self.stats_hook = stats_hook
+
+        self.node_pool = NodePool()         # The nodes of the current search
+        self.transposition_tables = {}      # Player -> mcts_transposition.TranspositionTable
+        self.search_stats = SearchStats()   # Statistics of the last move's search
+        self.root_node = None               # The tree searched for our last move, with reuse_tree
+        self.root_state = None
+        self.action = None                  # The action we played from root_state
+
+    def __getstate__(self):
+        # Parallel workers get the settings, not the trees; the stats hook (often a lambda) stays with the parent.
+        state = self.__dict__.copy()
+        state.update(node_pool=NodePool(), transposition_tables={}, root_node=None, root_state=None, action=None,
+                     stats_hook=None)
+        if self.endgame is not None:
+            state['endgame'] = EndgameSolver(self.endgame.threshold, self.endgame.max_positions)
+        return state
+
+    def within_budget(self, iterations, start):
+        """ Whether a search started at time start may run another iteration after the given number of them. """
+        return ((self.num_nodes is None or iterations < self.num_nodes) and
+                (self.time_limit is None or time() - start <= self.time_limit))
+
+    def settled(self, root_node, iterations, start):
+        """ Whether the move to be played can no longer change, so that a search may stop before its budget:
+        either the remaining budget cannot overtake the child the final-move policy picks (for most_visits, the most
+        visited child is ahead by more visits than the runner-up can get; for best_win_rate, every action has been
+        tried and no other child can reach the best one's win rate, even if all the remaining playouts went its way),
+        or every action has been tried and the win rate confidence interval of the best child lies above those of all
+        the others.
+
+        Args:
+            root_node:  The root of the search.
+            iterations: The iterations done so far.
+            start:      The time the search started.
+
+        """
+        children = list(root_node.child_nodes.values())
+        if len(children) < 2:
+            return False
+
+        # the iterations left, estimated from the rate so far when the budget is a time limit
+        remaining = float('inf')
+        if self.num_nodes is not None:
+            remaining = self.num_nodes - iterations
+        if self.time_limit is not None:
+            elapsed = time() - start
+            if elapsed > 0:
+                remaining = min(remaining, iterations * (self.time_limit - elapsed) / elapsed)
+
+        if self.final_move is most_visits:
+            visits = sorted(child.visits for child in children)
+            if visits[-1] - visits[-2] > remaining:
+                return True
+
+        if root_node.untried_actions:
+            return False
+
+        if self.final_move is best_win_rate and remaining < float('inf'):
+            # with r playouts left, a child at w / n ends between w / (n + r) and (w + r) / (n + r)
+            leader = max(children, key=lambda child: child.wins / child.visits)
+            lowest = leader.wins / (leader.visits + remaining)
+            if all((child.wins + remaining) / (child.visits + remaining) < lowest
+                   for child in children if child is not leader):
+                return True
+
+        def interval(child):
+            rate = child.wins / child.visits
+            margin = self.early_stop_z * 0.5 / sqrt(child.visits)
+            return rate - margin, rate + margin
+
+        intervals = sorted(interval(child) for child in children)
+        return intervals[-1][0] > max(upper for lower, upper in intervals[:-1])
+
+    def select_leaf(self, node, board, state):
+        """ Descends the tree with the selection policy to a node that still has untried actions, has no children or
+        is proven.
+
+        Args:
+            node:       A tree node from which the search is traversing.
+            board:      The game setup.
+            state:      The state of the game.
+
+        Returns:        The node reached, its state and its depth below node.
+
+        """
+        leaf_node = node
+        new_state = state
+        depth = 0
+
+        # search through the children, stopping at proven nodes as their result is known
+        while leaf_node.proven is None and not leaf_node.untried_actions and leaf_node.child_nodes:
+            action, leaf_node = self.selection(leaf_node, self.explore_faction)
+            depth += 1
+
+            # increase the game state while traversing the tree
+            new_state = board.next_state(new_state, action)
+
+        return leaf_node, new_state, depth
+
+    def expand_leaf(self, node, board, state):
+        """ Adds a new leaf to the tree by creating a new child node for the given node.
+
+        Args:
+            node:   The node for which a child will be added.
+            board:  The game setup.
+            state:  The state of the game.
+
+        Returns:    The added child node and its state.
+
+        """
+        # expand on a random action
+        next_action = node.untried_actions[self.rng.randrange(len(node.untried_actions))]
+        node.untried_actions.remove(next_action)
+
+        new_state = board.next_state(state, next_action)
+
+        new_node = self.node_pool.new(parent=node, parent_action=next_action,
+                                      legal_moves=board.legal_moves_mask(new_state))
+
+        # add reference in the parent node
+        node.child_nodes[next_action] = new_node
+
+        return new_node, new_state
+
+    def solve_leaf(self, node, board, state, identity_of_bot, deadline=None):
+        """ Marks a new leaf with its exact result if the endgame solver takes its state and can solve it. A solved
+        leaf is never expanded, as its playouts would only estimate what is already known.
+
+        Args:
+            node:               A leaf node.
+            board:              The game setup.
+            state:              The state of the game at node.
+            identity_of_bot:    The searching player.
+            deadline:           The time.time() by which the search must end, if it has a time limit; the solver
+                                gives up when it passes.
+
+        """
+        if not self.endgame.applies(board, state):
+            return
+        value = self.endgame.solve(board, state, deadline)
+        if value is not None:
+            node.proven = value if board.current_player(state) == identity_of_bot else -value
+            node.untried_actions[:] = []
+
+    @staticmethod
+    def propagate_proven(node, board, state, identity_of_bot):
+        """ Passes the exact result of a newly proven node on to its ancestors (MCTS-Solver). A node is won for the
+        player to move as soon as one child is, and otherwise proven once all its actions have been tried and all its
+        children are proven, with the best of their results for that player.
+
+        Args:
+            node:               A node whose proven result was just found.
+            board:              The game setup.
+            state:              The state of the game at node.
+            identity_of_bot:    The searching player, whom the proven results are for.
+
+        """
+        bot_moves = board.current_player(state) != identity_of_bot   # at node's parent; the players alternate
+        while node.parent is not None and node.parent.proven is None:
+            parent = node.parent
+            best = 1 if bot_moves else -1
+            if node.proven == best:
+                parent.proven = best
+            elif not parent.untried_actions and all(child.proven is not None
+                                                    for child in parent.child_nodes.values()):
+                results = [child.proven for child in parent.child_nodes.values()]
+                parent.proven = max(results) if bot_moves else min(results)
+            else:
+                return
+            node = parent
+            bot_moves = not bot_moves
+
+    @staticmethod
+    def backpropagate(node, won):
+        """ Navigates the tree from a leaf node to the root, updating the win and visit count of each node along the
+        path.
+
+        Args:
+            node:   A leaf node.
+            won:    An indicator of whether the bot won or lost the game.
+
+        """
+        # walk up to the root without recursing, so deep trees cannot hit the recursion limit
+        while node is not None:
+            # updates number of visits and wins
+            node.visits += 1
+            if won:
+                node.wins += 1
+            node = node.parent
+
+    @staticmethod
+    def backpropagate_playouts(node, wins, playouts):
+        """ Navigates the tree from a leaf node to the root, adding the results of a batch of playouts to each node.
+
+        Args:
+            node:       A leaf node.
+            wins:       The number of playouts the bot won.
+            playouts:   The number of playouts.
+
+        """
+        while node is not None:
+            node.visits += playouts
+            node.wins += wins
+            node = node.parent
+
+    def search(self, board, state, root_node=None, seed=None):
+        """ Performs MCTS by sampling games and calling the appropriate functions to construct the game tree.
+
+        Args:
+            board:      The game setup.
+            state:      The state of the game.
+            root_node:  An MCTSNode tree already searched from this state to keep growing, or None to start a new
+                        one.
+            seed:       If set, the engine's random numbers are reseeded with it before searching.
+
+        Returns:        The root node of the game tree. Its statistics are left in search_stats.
+
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        stats = SearchStats()
+        start = time()
+        identity_of_bot = board.current_player(state)
+
+        def keep_searching(iterations):
+            return self.within_budget(iterations, start)
+
+        self.node_pool = NodePool(self.max_nodes)
+
+        if self.use_arena:
+            root_node, iterations = mcts_arena.search(board, state, keep_searching, self.explore_faction,
+                                                      self.rollout, self.rng)
+            self.node_pool.count = self.node_pool.peak = root_node.arena.size
+        elif self.transposition_size:
+            # The table already finds the node of this state if it was searched before, so root_node is not
+            # needed. Each player gets its own table, as node statistics are kept from the point of view of the
+            # searching player.
+            if identity_of_bot not in self.transposition_tables:
+                self.transposition_tables[identity_of_bot] = \
+                    mcts_transposition.TranspositionTable(self.transposition_size)
+            table = self.transposition_tables[identity_of_bot]
+            lookups, hits = table.lookups, table.hits
+            root_node, iterations = mcts_transposition.search(board, state, keep_searching, self.explore_faction,
+                                                              self.rollout, table, self.selection, self.rng)
+            self.node_pool.count = self.node_pool.peak = len(table)
+            stats.transposition_lookups, stats.transposition_hits = table.lookups - lookups, table.hits - hits
+        else:
+            if root_node is None:
+                root_node = self.node_pool.new(parent=None, parent_action=None,
+                                               action_list=board.legal_actions(state))
+            else:
+                self.node_pool.adopt(root_node)
+
+            phase_seconds = dict.fromkeys(SearchStats.phases, 0.)
+            deadline = start + self.time_limit if self.time_limit is not None else None
+            iterations = 0
+            # stop early once the root's result is proven
+            while root_node.proven is None and keep_searching(iterations):
+                iterations += 1
+
+                # perform MCTS, timing each phase
+                selection_start = time()
+                leaf, sampled_game, depth = self.select_leaf(root_node, board, state)
+                expansion_start = time()
+                if leaf.untried_actions:
+                    leaf, sampled_game = self.expand_leaf(leaf, board, sampled_game)
+                    depth += 1
+                rollout_start = time()
+
+                if leaf.proven is None:
+                    if board.is_ended(sampled_game):
+                        leaf.proven = board.points_values(sampled_game)[identity_of_bot]
+                    elif self.endgame is not None:
+                        self.solve_leaf(leaf, board, sampled_game, identity_of_bot, deadline)
+                    if leaf.proven is not None:
+                        self.propagate_proven(leaf, board, sampled_game, identity_of_bot)
+
+                playouts = 1
+                if leaf.proven is not None:
+                    won = leaf.proven > 0
+                elif self.leaf_playouts > 1:
+                    playouts = self.leaf_playouts
+                    won = mcts_parallel.leaf_parallel_wins(self.rollout, board, sampled_game, identity_of_bot,
+                                                           playouts, self.leaf_engine, self.rng)
+                    stats.playouts += playouts
+                else:
+                    result_state = self.rollout(board, sampled_game, self.rng)
+                    won = board.points_values(result_state)[identity_of_bot] > 0
+                    stats.playouts += 1
+
+                backpropagation_start = time()
+                if playouts > 1:
+                    self.backpropagate_playouts(leaf, won, playouts)
+                else:
+                    self.backpropagate(leaf, won)
+                backpropagation_end = time()
+
+                phase_seconds['selection'] += expansion_start - selection_start
+                phase_seconds['expansion'] += rollout_start - expansion_start
+                phase_seconds['rollout'] += backpropagation_start - rollout_start
+                phase_seconds['backpropagation'] += backpropagation_end - backpropagation_start
+                stats.total_depth += depth
+                if depth > stats.max_depth:
+                    stats.max_depth = depth
+
+                if self.early_stop and iterations % self.early_stop_interval == 0 and \
+                        self.settled(root_node, iterations, start):
+                    break
+
+                # recycle the least-visited part of the tree once it reaches the node budget
+                if self.node_pool.full():
+                    self.node_pool.prune(root_node, int(self.max_nodes * (1 - self.prune_fraction)))
+
+            stats.phase_seconds = phase_seconds
+
+        if self.label:
+            print("{0} Tree Size: {1}".format(self.label, iterations))
+        stats.seconds = time() - start
+        stats.iterations = iterations
+        if self.use_arena or self.transposition_size:
+            stats.playouts = iterations
+        stats.nodes, stats.peak_nodes, stats.pruned = self.node_pool.count, self.node_pool.peak, self.node_pool.pruned
+        stats.peak_memory_kb = peak_memory_kb()
+        stats.root_visits = dict((action, child.visits) for action, child in root_node.child_nodes.items())
+        self.search_stats = stats
+        return root_node
+
+    def reuse(self, board, state):
+        """ Returns the node of the kept tree that was reached by our last action and the opponent's reply leading
+        to state, detached from its parent, or None if the tree has no such node (for instance in a new game). Arena
+        and transposition table searches do not use it.
+        """
+        if self.use_arena or self.transposition_size or self.root_node is None or \
+                self.action not in self.root_node.child_nodes:
+            return None
+
+        our_state = board.next_state(self.root_state, self.action)
+        for action, node in self.root_node.child_nodes[self.action].child_nodes.items():
+            if board.next_state(our_state, action) == state:
+                if node.proven is not None and not node.child_nodes:
+                    # a leaf proven by the solver or the end of the game, which a search could not grow
+                    return None
+                node.parent = None
+                node.parent_action = None
+                return node
+        return None
+
+    @staticmethod
+    def proven_action(root_node):
+        """ Returns the action of a child of root_node proven to win or draw as the root is, or None if the root is
+        not proven won or drawn or no child carries its result.
+        """
+        if root_node.proven is None or root_node.proven < 0:
+            return None
+        return next((action for action, child in root_node.child_nodes.items() if child.proven == root_node.proven),
+                    None)
+
+    def think(self, board, state):
+        """ Searches the game tree, in parallel over a shared tree or as num_searches merged searches if enabled.
+        When a single search proves the root won or drawn, a child with that result is played whatever its
+        statistics; a kept tree whose root is already proven is not searched at all. With only one legal move, it is
+        played without searching.
+
+        Args:
+            board:  The game setup.
+            state:  The state of the game.
+
+        Returns:    The action to be taken.
+
+        """
+        start = time()
+        moves = board.legal_moves_mask(state)
+        if not moves & (moves - 1):
+            # forget the kept tree, which does not follow this move
+            self.root_node = None
+            self.search_stats = SearchStats()
+            self.action = move_actions[moves.bit_length() - 1]
+        elif self.tree_workers > 1 or self.num_searches > 1:
+            if self.tree_workers > 1:
+                stats = mcts_parallel.tree_parallel_stats(self, board, state, self.tree_workers, self.tree_backend)
+            else:
+                stats = mcts_parallel.root_parallel_stats(self, board, state, self.num_searches)
+            self.search_stats = SearchStats()
+            self.search_stats.root_visits = dict((action, visits) for action, (wins, visits) in stats.items())
+            self.search_stats.iterations = self.search_stats.playouts = sum(self.search_stats.root_visits.values())
+            self.search_stats.peak_memory_kb = peak_memory_kb()
+            self.action = self.final_move(stats)
+        else:
+            root_node = self.search(board, state, self.reuse(board, state) if self.reuse_tree else None)
+            action = self.proven_action(root_node)
+            if action is None and root_node.proven is not None and \
+                    (root_node.proven >= 0 or not root_node.child_nodes):
+                # a kept root proven without a child to show for it: search a new tree instead
+                root_node = self.search(board, state)
+                action = self.proven_action(root_node)
+            if self.reuse_tree:
+                self.root_node, self.root_state = root_node, state
+
+            self.action = action if action is not None else self.final_move(mcts_parallel.root_stats(root_node))
+
+        self.search_stats.seconds = time() - start
+        if self.stats_hook is not None:
+            self.stats_hook(self.search_stats)
+        if mcts_profile.profile is not None:
+            mcts_profile.profile.record(self.search_stats)
+        return self.action
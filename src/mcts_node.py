@@ -1,7 +1,19 @@
 
 
+import sys
+from p2_t3 import move_actions, iter_moves
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
 class MCTSNode:
-    def __init__(self, parent=None, parent_action=None, action_list=[]):
+    __slots__ = ('parent', 'parent_action', 'child_nodes', 'legal_moves', '_untried_actions', 'wins', 'visits',
+                 'proven')
+
+    def __init__(self, parent=None, parent_action=None, action_list=None, legal_moves=0):
         """ Initializes the tree node for MCTS. The node stores links to other nodes in the tree (parent and child
         nodes), as well as keeps track of the number of wins and total simulations that have visited the node.
 
@@ -9,16 +21,29 @@ class MCTSNode:
             parent:         The parent node of this node.
             parent_action:  The action taken from the parent node that transitions the state to this node.
             action_list:    The list of legal actions to be considered at this node.
+            legal_moves:    Instead of action_list, a p2_t3 move mask of the legal actions. It is only turned into
+                            the untried_actions list the first time that list is needed.
 
         """
         self.parent = parent                    # Parent node to this node
         self.parent_action = parent_action      # The move that got us to this node - "None" for the root node.
 
         self.child_nodes = {}                   # Action -> MCTSNode dictionary of children
-        self.untried_actions = action_list      # Yet unexplored actions
+        self.legal_moves = legal_moves          # Move mask of the legal actions, until untried_actions is built
+        self._untried_actions = action_list     # Yet unexplored actions, None until built from legal_moves
 
         self.wins = 0                           # Total wins of all paths through this node.
         self.visits = 0                         # Number of times this node has been visited.
+        self.proven = None                      # Exact result of the game from here for the searching bot (1 win,
+                                                # 0 draw, -1 loss), or None if unknown.
+
+    @property
+    def untried_actions(self):
+        """ Yet unexplored actions. Most leaves are never expanded, so the list is only built on first use. """
+        if self._untried_actions is None:
+            self._untried_actions = [move_actions[i] for i in iter_moves(self.legal_moves)]
+            self.legal_moves = 0
+        return self._untried_actions
 
     def __repr__(self):
         """
@@ -43,3 +68,86 @@ class MCTSNode:
             for child in self.child_nodes.values():
                 string += child.tree_to_string(horizon - 1, indent + 1)
         return string
+
+
+class NodePool:
+    def __init__(self, max_nodes=0):
+        """ Hands out the MCTSNodes of one search while keeping the tree within a node budget. Nodes removed by prune
+        are kept on a free list and handed out again, so a long search stops allocating once it reaches the budget.
+
+        Args:
+            max_nodes:  The most nodes the tree may hold before it has to be pruned, or 0 for no limit.
+
+        """
+        self.max_nodes = max_nodes
+        self.count = 0                          # Nodes currently in the tree
+        self.peak = 0                           # Most nodes the tree has held at once
+        self.pruned = 0                         # Nodes removed by prune so far
+        self.free = []                          # Pruned nodes waiting to be reused
+
+    def new(self, parent=None, parent_action=None, action_list=None, legal_moves=0):
+        """ Returns a new node, recycling a pruned one if there is any. Takes the arguments of MCTSNode. """
+        if self.free:
+            node = self.free.pop()
+            node.__init__(parent, parent_action, action_list, legal_moves)
+        else:
+            node = MCTSNode(parent, parent_action, action_list, legal_moves)
+        self.count += 1
+        if self.count > self.peak:
+            self.peak = self.count
+        return node
+
+    def adopt(self, root):
+        """ Counts the nodes of a tree kept from an earlier search, so that they come out of the budget too. """
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.child_nodes.values())
+            self.count += 1
+        self.peak = max(self.peak, self.count)
+
+    def full(self):
+        """ Whether the tree has reached the node budget. """
+        return 0 < self.max_nodes <= self.count
+
+    def prune(self, root, target):
+        """ Removes the least-visited leaves until at most target nodes are left. A leaf's parent can become a leaf in
+        turn, so whole little-visited subtrees go. The action of a removed node is handed back to its parent's untried
+        actions, so the search can expand it again later.
+
+        Args:
+            root:   The root of the tree. It and its children, which the move is chosen from, are never removed,
+                    nor are proven leaves, which the proven results of their ancestors rest on.
+            target: The number of nodes to keep.
+
+        """
+        while self.count > target:
+            leaves, stack = [], [root]
+            while stack:
+                node = stack.pop()
+                if node.child_nodes:
+                    stack.extend(node.child_nodes.values())
+                elif node is not root and node.parent is not root and node.proven is None:
+                    leaves.append(node)
+            if not leaves:
+                return
+
+            leaves.sort(key=lambda leaf: leaf.visits)
+            for leaf in leaves[:self.count - target]:
+                parent = leaf.parent
+                del parent.child_nodes[leaf.parent_action]
+                parent.untried_actions.append(leaf.parent_action)
+                leaf.parent = None
+                self.free.append(leaf)
+                self.count -= 1
+                self.pruned += 1
+
+
+def peak_memory_kb():
+    """ Returns the peak resident memory of this process in kilobytes, or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports it in bytes, Linux and the BSDs in kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.sharedctypes import RawArray, RawValue
+from timeit import default_timer as time
+from mcts_arena import NodeArena
+from rollout_rng import RolloutRNG
+
+workers = os.cpu_count() or 1
+tree_capacity = 1 << 20     # Nodes of a shared tree whose search has no iteration limit
+
+_pool = None
+
+
+def get_pool():
+    """ Returns the process pool shared by every parallel search, creating it on first use.
+
+    The pool lives for the rest of the program so that process startup is paid once, not on every move.
+
+    """
+    global _pool
+    if _pool is None:
+        # The simulator scripts play their games at import time, so workers must be forked rather than spawned
+        # (which would re-run the script) wherever the platform allows it.
+        context = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    return _pool
+
+
+def _rollout_wins(rollout, board, state, identity, playouts, seed):
+    # Runs in a worker process: plays the rollout from state several times.
+    rng = RolloutRNG(seed)
+    return sum(board.points_values(rollout(board, state, rng))[identity] > 0 for _ in range(playouts))
+
+
+def leaf_parallel_wins(rollout, board, state, identity, playouts, engine='batch', rng=None):
+    """ Plays a batch of playouts from one leaf state and counts the ones won by identity.
+
+    Args:
+        rollout:        The rollout policy used by the 'pool' engine.
+        board:          The game setup.
+        state:          The state of the game at the leaf.
+        identity:       The bot's player number.
+        playouts:       The number of playouts.
+        engine:         'batch' to play them in lockstep with batch_rollout (uniformly random moves, needs NumPy), or
+                        'pool' to split them over the process pool.
+        rng:            The RolloutRNG the batch draws from and the workers' seeds are taken from, or None for a new
+                        unseeded one.
+
+    Returns:            The number of playouts won.
+
+    """
+    if rng is None:
+        rng = RolloutRNG()
+    if engine == 'batch':
+        import batch_rollout
+        return batch_rollout.count_wins(state, identity, playouts, rng.generator)
+    if engine != 'pool':
+        raise ValueError("Unknown engine: {0}".format(engine))
+
+    pool = get_pool()
+    chunks = [playouts // workers + (i < playouts % workers) for i in range(min(workers, playouts))]
+    futures = [pool.submit(_rollout_wins, rollout, board, state, identity, chunk, rng.spawn_seed())
+               for chunk in chunks]
+    return sum(future.result() for future in futures)
+
+
+def root_stats(root_node):
+    """ Returns an action -> (wins, visits) dictionary of the root's children. """
+    return dict((action, (child.wins, child.visits)) for action, child in root_node.child_nodes.items())
+
+
+def _search_root_stats(engine, board, state, seed):
+    # Runs in a worker process: one independent search with its own seed.
+    return root_stats(engine.search(board, state, seed=seed))
+
+
+def root_parallel_stats(engine, board, state, searches):
+    """ Runs independent searches from the same state in the process pool and merges their root statistics.
+
+    Args:
+        engine:         The mcts_engine.MCTSEngine whose search is run in each worker.
+        board:          The game setup.
+        state:          The state of the game.
+        searches:       The number of independent searches.
+
+    Returns:            An action -> (wins, visits) dictionary summed over all searches.
+
+    """
+    pool = get_pool()
+    futures = [pool.submit(_search_root_stats, engine, board, state, engine.rng.spawn_seed())
+               for _ in range(searches)]
+
+    merged = {}
+    for future in futures:
+        for action, (wins, visits) in future.result().items():
+            total_wins, total_visits = merged.get(action, (0, 0))
+            merged[action] = (total_wins + wins, total_visits + visits)
+    return merged
+
+
+class SharedTree(NodeArena):
+    """ A NodeArena whose columns live in shared memory, so that several threads or forked processes can grow one
+    tree together. Its capacity is fixed when it is created, and it must only be used with its lock held.
+    """
+    def __init__(self, capacity, lock):
+        self.lock = lock
+        self.capacity = capacity
+        self.parent = RawArray('i', capacity)
+        self.action = RawArray('b', capacity)
+        self.wins = RawArray('i', capacity)
+        self.visits = RawArray('i', capacity)
+        self.first_child = RawArray('i', capacity)
+        self.child_count = RawArray('b', capacity)
+        self.shared_size = RawValue('i', 1)
+        self.iterations = RawValue('i', 0)
+        self.parent[0] = -1
+        self.action[0] = -1
+        self.child_count[0] = -1
+
+    @property
+    def size(self):
+        return self.shared_size.value
+
+    @size.setter
+    def size(self, size):
+        self.shared_size.value = size
+
+    def grow(self, capacity):
+        return False
+
+
+def _tree_worker(tree, engine, board, state, start, seed):
+    # Runs in a thread or forked process: plays shared-tree iterations until the search is out of budget.
+    rng = RolloutRNG(seed)
+    identity = board.current_player(state)
+
+    while True:
+        with tree.lock:
+            if not engine.within_budget(tree.iterations.value, start):
+                return
+            tree.iterations.value += 1
+            leaf, leaf_state = tree.select(board, state, engine.explore_faction, rng)
+
+        result_state = engine.rollout(board, leaf_state, rng)
+        won = board.points_values(result_state)[identity] > 0
+
+        with tree.lock:
+            tree.backup(leaf, won)
+
+
+def tree_parallel_stats(engine, board, state, workers, backend='thread'):
+    """ Runs one search over a shared tree with several workers, using an engine's budget, rollout and exploration
+    factor.
+
+    Args:
+        engine:         The mcts_engine.MCTSEngine; its budget covers the iterations of all workers together.
+        board:          The game setup.
+        state:          The state of the game.
+        workers:        The number of concurrent workers.
+        backend:        'thread' for threads, or 'process' for forked processes sharing the tree's memory.
+
+    Returns:            An action -> (wins, visits) dictionary of the root's children.
+
+    """
+    if backend == 'thread':
+        lock, runner_class = threading.Lock(), threading.Thread
+    elif backend == 'process':
+        # The tree's arrays are inherited by the workers, so they have to be forked.
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise ValueError("The process backend needs the 'fork' start method")
+        context = multiprocessing.get_context('fork')
+        lock, runner_class = context.Lock(), context.Process
+    else:
+        raise ValueError("Unknown backend: {0}".format(backend))
+
+    seeds = [engine.rng.spawn_seed() for _ in range(workers)]
+
+    # Each iteration expands at most one node, which has at most 81 children.
+    capacity = tree_capacity if engine.num_nodes is None else 1 + 81 * engine.num_nodes
+    tree = SharedTree(capacity, lock)
+    start = time()
+    runners = [runner_class(target=_tree_worker, args=(tree, engine, board, state, start, seed))
+               for seed in seeds]
+    for runner in runners:
+        runner.start()
+    for runner in runners:
+        runner.join()
+
+    return root_stats(tree.node(0))
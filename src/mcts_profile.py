@@ -0,0 +1,150 @@
+""" Opt-in profiling of the MCTS bots.
+
+While a Profile is enabled, every MCTSEngine move adds its phase times and counters (from its SearchStats) to it, and
+a background thread can sample the Python call stack of the searching thread. Disabled, it costs the engine one test
+per move. p2_sim.py turns it on with --profile or the MCTS_PROFILE environment variable; elsewhere:
+
+    profile = mcts_profile.enable(sample_interval=0.001)
+    ...  # play
+    mcts_profile.disable()
+    profile.report()
+    profile.write_collapsed('mcts.collapsed')   # for flamegraph.pl or speedscope
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+# The Profile being filled, or None when profiling is off.
+profile = None
+
+
+class Profile(object):
+    """ Per-phase search times and counters summed over moves, and sampled call stacks. """
+    counter_names = ('moves', 'iterations', 'playouts', 'nodes', 'pruned')
+
+    def __init__(self, sample_interval=None):
+        """
+        Args:
+            sample_interval:    Seconds between two call stack samples, or None not to sample.
+
+        """
+        self.sample_interval = sample_interval
+        self.counters = Counter()           # Counter name -> total
+        self.phase_seconds = Counter()      # Search phase -> seconds, and 'search' -> seconds of the whole moves
+        self.stacks = Counter()             # Collapsed stack ("outer;...;inner" frames) -> samples
+        self.stop_event = None
+        self.sampler = None
+        self.switch_interval = None
+
+    def record(self, stats):
+        """ Adds the mcts_stats.SearchStats of one move. """
+        self.counters['moves'] += 1
+        self.counters['iterations'] += stats.iterations
+        self.counters['playouts'] += stats.playouts
+        self.counters['nodes'] += stats.nodes
+        self.counters['pruned'] += stats.pruned
+        self.phase_seconds.update(stats.phase_seconds)
+        self.phase_seconds['search'] += stats.seconds
+
+    def start_sampling(self):
+        """ Starts sampling the call stack of the calling thread, if the profile has a sample interval. """
+        if self.sample_interval is None or self.sampler is not None:
+            return
+        # A waking sampler otherwise waits up to the switch interval (5 ms) for the GIL, and mostly gets it when the
+        # searching thread releases it, e.g. inside NumPy, which would bias the samples towards such calls.
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, 1e-5))
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, args=(threading.get_ident(), self.stop_event),
+                                        daemon=True)
+        self.sampler.start()
+
+    def stop_sampling(self):
+        if self.sampler is not None:
+            self.stop_event.set()
+            self.sampler.join()
+            self.sampler = None
+            sys.setswitchinterval(self.switch_interval)
+
+    def sample(self, thread_id, stop_event):
+        # Runs in the sampling thread until stop_event is set.
+        while not stop_event.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                return
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append("%s:%s" % (os.path.splitext(os.path.basename(code.co_filename))[0], code.co_name))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(frames))] += 1
+
+    def as_dict(self):
+        """ Returns the profile as plain values, to be sent from a worker process and merged. """
+        return dict(counters=dict(self.counters), phase_seconds=dict(self.phase_seconds), stacks=dict(self.stacks))
+
+    def merge(self, data):
+        """ Adds a profile returned by as_dict. """
+        self.counters.update(data['counters'])
+        self.phase_seconds.update(data['phase_seconds'])
+        self.stacks.update(data['stacks'])
+
+    def write_collapsed(self, path):
+        """ Writes the sampled stacks in the collapsed format read by flamegraph.pl and speedscope: one
+        "frame;frame;frame samples" line per stack.
+        """
+        with open(path, 'w') as f:
+            for stack, samples in sorted(self.stacks.items()):
+                f.write("%s %d\n" % (stack, samples))
+
+    def report(self, top=15):
+        """ Prints the counters, the time of each search phase and, if stacks were sampled, the top functions by
+        samples in which they were running (self) or on the stack (total).
+        """
+        search = self.phase_seconds['search']
+        iterations = self.counters['iterations']
+        print("")
+        print("Profile:")
+        for name in self.counter_names:
+            print("  %-16s %12d" % (name, self.counters[name]))
+        if search:
+            print("  %-16s %12.0f" % ("iterations/s", iterations / search))
+
+        print("")
+        print("  %-16s %12s %8s %14s" % ("phase", "seconds", "share", "usec/iteration"))
+        for phase, seconds in sorted(self.phase_seconds.items(), key=lambda item: -item[1]):
+            print("  %-16s %12.3f %7.1f%% %14.1f" % (phase, seconds, 100 * seconds / search if search else 0.,
+                                                     1e6 * seconds / iterations if iterations else 0.))
+
+        if self.stacks:
+            own, inclusive = Counter(), Counter()
+            for stack, samples in self.stacks.items():
+                frames = stack.split(";")
+                own[frames[-1]] += samples
+                for frame in set(frames):
+                    inclusive[frame] += samples
+            total = sum(self.stacks.values())
+            print("")
+            print("  %-40s %8s %8s   (%d samples)" % ("function", "self", "total", total))
+            for frame, samples in own.most_common(top):
+                print("  %-40s %7.1f%% %7.1f%%" % (frame, 100 * samples / total, 100 * inclusive[frame] / total))
+
+
+def enable(sample_interval=None):
+    """ Starts collecting a new Profile, sampling the calling thread's stack every sample_interval seconds if it is
+    set, and returns it.
+    """
+    global profile
+    disable()
+    profile = Profile(sample_interval)
+    profile.start_sampling()
+    return profile
+
+
+def disable():
+    """ Stops profiling; the Profile collected so far stays with whoever holds it. """
+    global profile
+    if profile is not None:
+        profile.stop_sampling()
+        profile = None
@@ -0,0 +1,52 @@
+class SearchStats(object):
+    """ What the search for one move did. MCTSEngine keeps the last one as search_stats and hands each one to its
+    stats_hook.
+
+    Depths and phase times are only measured by single searches on MCTSNode trees; the other searches leave them at 0.
+
+    """
+    # Phases of an iteration: descending the tree, adding a leaf, evaluating the leaf (playouts, or the exact result
+    # of a terminal or solved leaf) and backing up the result.
+    phases = ('selection', 'expansion', 'rollout', 'backpropagation')
+
+    def __init__(self):
+        self.iterations = 0                                 # Search iterations, over all workers
+        self.playouts = 0                                   # Games played out; proven leaves need none
+        self.seconds = 0.                                   # Wall time of the search
+        self.nodes = 0                                      # Nodes in the tree when the search ended
+        self.peak_nodes = 0                                 # Most nodes the tree held at once
+        self.pruned = 0                                     # Nodes removed to keep within the node budget
+        self.peak_memory_kb = None                          # Peak resident memory of the process, where known
+        self.max_depth = 0                                  # Depth of the deepest leaf evaluated
+        self.total_depth = 0                                # Depths of the evaluated leaves, summed
+        self.phase_seconds = dict.fromkeys(self.phases, 0.)  # Phase -> seconds spent in it
+        self.root_visits = {}                               # Action -> visits of each child of the root
+        self.transposition_lookups = 0                      # Transposition table lookups, by table searches
+        self.transposition_hits = 0                         # Lookups that found a node
+
+    @property
+    def playouts_per_second(self):
+        return self.playouts / self.seconds if self.seconds else 0.
+
+    @property
+    def average_depth(self):
+        return self.total_depth / self.iterations if self.iterations else 0.
+
+    @property
+    def transposition_hit_rate(self):
+        return self.transposition_hits / self.transposition_lookups if self.transposition_lookups else 0.
+
+    def as_dict(self):
+        """ Returns the statistics as plain values that can be pickled or written as JSON, with the root visits as a
+        list of [action, visits] pairs, most visited first.
+        """
+        stats = dict(self.__dict__, playouts_per_second=self.playouts_per_second, average_depth=self.average_depth,
+                     transposition_hit_rate=self.transposition_hit_rate)
+        stats['phase_seconds'] = dict(self.phase_seconds)
+        stats['root_visits'] = sorted(([list(action), visits] for action, visits in self.root_visits.items()),
+                                      key=lambda pair: -pair[1])
+        return stats
+
+    def __repr__(self):
+        return "SearchStats(iterations={0}, playouts/s={1:.0f}, nodes={2}, depth={3:.1f}/{4})".format(
+            self.iterations, self.playouts_per_second, self.nodes, self.average_depth, self.max_depth)
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+import random
+from mcts_node import MCTSNode
+
+
+class TranspositionTable(object):
+    """ A bounded map from the Zobrist hash of a state (Board.hash) to the MCTSNode holding its statistics, so that
+    every move order reaching the same state shares one node and the tree becomes a DAG.
+
+    When the table is full the least recently used entry is dropped. Its node stays in the tree, but is no longer
+    shared with new paths to its state.
+
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.nodes = OrderedDict()
+        self.lookups = 0        # Calls to get, over the table's lifetime; a search's share is in its SearchStats
+        self.hits = 0           # Calls to get that found a node
+
+    def get(self, key):
+        """ Returns the node stored for key, or None. """
+        self.lookups += 1
+        node = self.nodes.get(key)
+        if node is not None:
+            self.hits += 1
+            self.nodes.move_to_end(key)
+        return node
+
+    def put(self, key, node):
+        """ Stores node for key, evicting the least recently used entry if the table is full. """
+        self.nodes[key] = node
+        if len(self.nodes) > self.capacity:
+            self.nodes.popitem(last=False)
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def search(board, state, keep_searching, explore_faction, rollout, table, selection, rng=random):
+    """ Performs MCTS over a DAG whose nodes are shared through a transposition table.
+
+    A node can be reached through several parents, so its parent link is meaningless: results are backed up along the
+    path taken by each iteration instead. Child statistics are shared, and each parent runs the selection policy over
+    them with its own visit count.
+
+    Args:
+        board:              The game setup.
+        state:              The state of the game.
+        keep_searching:     Given the number of iterations done so far, whether to run another one.
+        explore_faction:    The exploration constant of the selection policy.
+        rollout:            The rollout function, returning the end state of a game played out from a state.
+        table:              The TranspositionTable, which may already hold nodes from earlier searches by the same
+                            player.
+        selection:          The selection policy, (node, explore_faction) -> the (action, child) to descend to.
+        rng:                The source of random numbers, for the rollouts and the tree.
+
+    Returns:                The root node and the number of iterations.
+
+    """
+    identity_of_bot = board.current_player(state)
+    root_key = board.hash(state)
+    root_node = table.get(root_key)
+    if root_node is None:
+        root_node = MCTSNode(legal_moves=board.legal_moves_mask(state))
+        table.put(root_key, root_node)
+
+    iterations = 0
+    while keep_searching(iterations):
+        iterations += 1
+        node = root_node
+        path = [node]
+        sampled_game, key = state, root_key
+
+        while not node.untried_actions and node.child_nodes:
+            action, node = selection(node, explore_faction)
+            sampled_game, key = board.next_state_hashed(sampled_game, action, key)
+            path.append(node)
+
+        if node.untried_actions:
+            next_action = node.untried_actions[rng.randrange(len(node.untried_actions))]
+            node.untried_actions.remove(next_action)
+            sampled_game, key = board.next_state_hashed(sampled_game, next_action, key)
+            child = table.get(key)
+            if child is None:
+                child = MCTSNode(parent=node, parent_action=next_action,
+                                 legal_moves=board.legal_moves_mask(sampled_game))
+                table.put(key, child)
+            node.child_nodes[next_action] = child
+            path.append(child)
+
+        result_state = rollout(board, sampled_game, rng)
+        won = board.points_values(result_state)[identity_of_bot] > 0
+
+        for node in path:
+            node.visits += 1
+            if won:
+                node.wins += 1
+
+    return root_node, iterations
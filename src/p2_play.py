@@ -21,7 +21,9 @@ players = dict(
     random_bot=random_bot.think,
     rollout_bot=rollout_bot.think,
     mcts_vanilla=mcts_vanilla.think,
-    mcts_modified=mcts_modified.think
+    mcts_modified=mcts_modified.think,
+    mcts_vanilla_reuse=mcts_vanilla.reuse_engine.think,
+    mcts_modified_reuse=mcts_modified.reuse_engine.think
 )
 
 board = p2_t3.Board()
@@ -1,4 +1,33 @@
-import sys
+""" Plays bots against each other.
+
+Usage: python p2_sim.py p1 p2
+           Plays rounds games of p1 (moving first) against p2, one after another.
+       python p2_sim.py --tournament [player ...]
+           Plays games-per-pair games for every pair of the given players (all of them if none are given) over a pool
+           of worker processes, alternating who moves first, and prints each result as it comes in.
+       python p2_sim.py --sprt p1 p2 [--elo0 E0] [--elo1 E1] [--alpha A] [--beta B]
+           Plays p1 against p2 in parallel, alternating who moves first, until a sequential probability ratio test
+           decides between "p1 is E0 Elo stronger than p2" and "p1 is E1 Elo stronger", with false positive rate A
+           and false negative rate B.
+
+Every mode ends with the percentiles of the wall and CPU time each bot took per move, overall and by phase of the game,
+and a summary of the MCTS bots' searches; --move-times FILE also writes the time of every move to FILE, as CSV or, if
+FILE ends in .jsonl, JSON lines.
+
+--profile (or the environment variable MCTS_PROFILE=1) also profiles the MCTS bots with mcts_profile, and
+--profile-sample MS (or MCTS_PROFILE_SAMPLE=MS) samples their call stacks every MS milliseconds into the collapsed stack
+file --profile-out, for flame graphs.
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import process_time
 from timeit import default_timer as time
 import p2_t3
 import mcts_vanilla
@@ -6,8 +35,10 @@ import mcts_vanilla100
 import mcts_vanilla_time
 import mcts_modified
 import mcts_modified_time
+import mcts_profile
 import random_bot
 import rollout_bot
+from mcts_stats import SearchStats
 
 players = dict(
     random_bot=random_bot.think,
@@ -16,58 +47,471 @@ players = dict(
     mcts_vanilla100=mcts_vanilla100.think,
     mcts_vanilla_time=mcts_vanilla_time.think,
     mcts_modified=mcts_modified.think,
-    mcts_modified_time=mcts_modified_time.think
+    mcts_modified_time=mcts_modified_time.think,
+    mcts_vanilla_reuse=mcts_vanilla.reuse_engine.think,
+    mcts_modified_reuse=mcts_modified.reuse_engine.think
 )
 
+# The engines behind the players, reseeded before every game (see reseed).
+engines = [mcts_vanilla.engine, mcts_vanilla100.engine, mcts_vanilla_time.engine, mcts_modified.engine,
+           mcts_modified_time.engine, mcts_vanilla.reuse_engine, mcts_modified.reuse_engine]
+
 board = p2_t3.Board()
 state0 = board.starting_state()
 
-if len(sys.argv) != 3:
-    print("Need two player arguments")
-    exit(1)
 
-p1 = sys.argv[1]
-if p1 not in players:
-    print("p1 not in "+players.keys().join(","))
-    exit(1)
-p2 = sys.argv[2]
-if p2 not in players:
-    print("p2 not in "+players.keys().join(","))
-    exit(1)
+def reseed(seed):
+    """ Seeds the random numbers of every bot. Forked workers start with copies of the same generators, so without
+    this they would all play the same games; with it, a game can also be replayed from its seed (as far as the time
+    limited bots allow).
+    """
+    random.seed(seed)
+    rollout_bot.rng.seed(seed)
+    for i, engine in enumerate(engines, 1):
+        engine.rng.seed(seed * (len(engines) + 1) + i)
 
-player1 = players[p1]
-player2 = players[p2]
 
-rounds = 100
-wins = {'draw':0, 1:0, 2:0}
+def play_game(p1, p2, seed=None, profile=None):
+    """ Plays one game.
 
-start = time()  # To log how much time the simulation takes.
-for i in range(rounds):
+    Args:
+        p1:         The name of the player moving first.
+        p2:         The name of the other player.
+        seed:       If set, the bots are reseeded with it first.
+        profile:    If set, the game is profiled, sampling the call stack every profile seconds (0 not to sample).
 
-    print("")
-    print("Round %d, fight!" % i)
+    Returns:        The winner (1, 2 or 'draw'), the final score (Board.points_values), a (move number, player name,
+                    wall seconds, CPU seconds) tuple for every move, a (player name, SearchStats.as_dict()) pair for
+                    every search of an MCTS bot, and the game's mcts_profile.Profile.as_dict() (None if not
+                    profiled). The CPU time is that of this process, so it leaves out searches handed to other
+                    processes.
+
+    """
+    if seed is not None:
+        reseed(seed)
+    player1 = players[p1]
+    player2 = players[p2]
+    moves = []
+    searches = []
+
+    # collect the statistics of the MCTS bots' searches through their engines' hook
+    for name in (p1, p2):
+        engine = getattr(players[name], '__self__', None)
+        if engine in engines:
+            engine.stats_hook = lambda stats, name=name: searches.append((name, stats.as_dict()))
+
+    if profile is not None:
+        mcts_profile.enable(profile or None)
 
     state = state0
-    last_action = None
-    current_player = player1
+    current_player, current_name = player1, p1
     while not board.is_ended(state):
+        wall, cpu = time(), process_time()
         last_action = current_player(board, state)
+        moves.append((len(moves) + 1, current_name, time() - wall, process_time() - cpu))
         state = board.next_state(state, last_action)
-        current_player = player1 if current_player == player2 else player2
-    print("Finished!")
-    print()
+        current_player, current_name = (player1, p1) if current_player == player2 else (player2, p2)
+
+    for engine in engines:
+        engine.stats_hook = None
+    game_profile = None
+    if profile is not None:
+        game_profile = mcts_profile.profile.as_dict()
+        mcts_profile.disable()
+
     final_score = board.points_values(state)
     winner = 'draw'
     if final_score[1] == 1:
         winner = 1
     elif final_score[2] == 1:
         winner = 2
-    print("The %s bot wins this round! (%s)" % (winner, str(final_score)))
-    wins[winner] = wins.get(winner, 0) + 1
+    return winner, final_score, moves, searches, game_profile
+
+
+def schedule(names, games_per_pair):
+    """ Returns the (p1, p2) games of a round robin between names, with each pair swapping who moves first from one
+    game to the next.
+    """
+    games = []
+    for a, b in itertools.combinations(names, 2):
+        games.extend((a, b) if i % 2 == 0 else (b, a) for i in range(games_per_pair))
+    return games
+
+
+def run_games(games, workers, seed, profile=None):
+    """ Plays games over a pool of worker processes, yielding (index, p1, p2) followed by what play_game returns
+    (winner, final score, move times, search statistics and profile) for each game as soon as it ends.
+    Game i is played with seed + i, and profiled as set by profile (see play_game).
+    """
+    if workers <= 1:
+        for i, (p1, p2) in enumerate(games):
+            yield (i, p1, p2) + play_game(p1, p2, seed + i, profile)
+        return
+
+    # Forked workers inherit the bots as they are; elsewhere they are rebuilt by importing this module.
+    context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    try:
+        futures = dict((pool.submit(play_game, p1, p2, seed + i, profile), (i, p1, p2))
+                       for i, (p1, p2) in enumerate(games))
+        for future in as_completed(futures):
+            i, p1, p2 = futures[future]
+            yield (i, p1, p2) + future.result()
+    finally:
+        # If the caller stops early, the games not yet started are dropped.
+        pool.shutdown(cancel_futures=True)
+
+
+def tournament(names, games_per_pair, workers, seed, move_times, search_totals, profile):
+    """ Plays a round robin between names and prints every game as it ends, then the standings (a win scores 1 and a
+    draw 1/2). The times of the moves go to the MoveTimes move_times, the search statistics to the SearchTotals
+    search_totals, and the games' profiles to the mcts_profile.Profile profile if it is set.
+    """
+    games = schedule(names, games_per_pair)
+    # name -> [wins, draws, losses]
+    records = dict((name, [0, 0, 0]) for name in names)
+    # (name, opponent) -> [wins, draws, losses] of name against opponent
+    pairs = dict(((a, b), [0, 0, 0]) for a in names for b in names if a != b)
+
+    print("Playing %d games on %d workers" % (len(games), workers))
+    results = run_games(games, workers, seed, profiling(profile))
+    for done, (i, p1, p2, winner, final_score, moves, searches, game_profile) in enumerate(results, 1):
+        move_times.add(i, moves)
+        search_totals.add(searches)
+        if profile is not None:
+            profile.merge(game_profile)
+        if winner == 'draw':
+            result = "draw"
+            outcomes = ((p1, p2, 1), (p2, p1, 1))
+        else:
+            result = (p1, p2)[winner - 1] + " wins"
+            outcomes = ((p1, p2, 0 if winner == 1 else 2), (p2, p1, 0 if winner == 2 else 2))
+        for name, opponent, outcome in outcomes:
+            records[name][outcome] += 1
+            pairs[name, opponent][outcome] += 1
+        print("[%d/%d] game %d: %s vs %s: %s" % (done, len(games), i, p1, p2, result), flush=True)
+
+    def score(record):
+        wins, draws, losses = record
+        return wins + 0.5 * draws
+
+    print("")
+    print("%-20s %6s %6s %6s %7s" % ("player", "wins", "draws", "losses", "score"))
+    for name in sorted(names, key=lambda name: -score(records[name])):
+        print("%-20s %6d %6d %6d %7.1f" % ((name,) + tuple(records[name]) + (score(records[name]),)))
+    print("")
+    for (name, opponent), record in sorted(pairs.items()):
+        print("%s vs %s: %d-%d-%d" % ((name, opponent) + tuple(record)))
+
+
+def percentile(ordered, p):
+    """ The p-th percentile (nearest rank) of a sorted non-empty list. """
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class MoveTimes(object):
+    """ The wall and CPU time of every think call of a run, and their latency summary. """
+    # Moves are grouped into phases of this many moves of a game.
+    phase_length = 10
+
+    def __init__(self):
+        self.records = []   # (game, move number, player name, wall seconds, CPU seconds)
+
+    def add(self, game, moves):
+        """ Records the move times of a game, as returned by play_game. """
+        self.records.extend((game,) + move for move in moves)
+
+    def report(self):
+        """ Prints the p50/p95/p99/max wall and CPU milliseconds per move of every player, overall and per phase. """
+        groups = {}
+        for game, move, name, wall, cpu in self.records:
+            phase = (move - 1) // self.phase_length
+            for key in ((name, None), (name, phase)):
+                groups.setdefault(key, ([], []))
+                groups[key][0].append(wall)
+                groups[key][1].append(cpu)
+
+        print("")
+        print("Milliseconds per move (wall / CPU):")
+        print("%-20s %-8s %6s %15s %15s %15s %15s" % ("player", "moves", "count", "p50", "p95", "p99", "max"))
+        def order(key):
+            name, phase = key
+            return name, -1 if phase is None else phase
+
+        for (name, phase), (walls, cpus) in sorted(groups.items(), key=lambda item: order(item[0])):
+            walls, cpus = sorted(walls), sorted(cpus)
+            if phase is None:
+                moves = "all"
+            else:
+                moves = "%d-%d" % (phase * self.phase_length + 1, (phase + 1) * self.phase_length)
+            print("%-20s %-8s %6d" % (name, moves, len(walls)) +
+                  "".join(" %7.1f/%7.1f" % (1000 * percentile(walls, p), 1000 * percentile(cpus, p))
+                          for p in (50, 95, 99, 100)))
+
+    def write(self, path):
+        """ Writes one line per move to path: JSON lines if it ends in .jsonl, CSV otherwise. """
+        fields = ('game', 'move', 'player', 'wall', 'cpu')
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.jsonl'):
+                for record in self.records:
+                    f.write(json.dumps(dict(zip(fields, record))) + '\n')
+            else:
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                writer.writerows(self.records)
+
+
+def profiling(profile):
+    """ The profile argument of play_game that profiles games like the mcts_profile.Profile profile (or None). """
+    if profile is None:
+        return None
+    return profile.sample_interval or 0
+
+
+class SearchTotals(object):
+    """ The search statistics of the MCTS bots, summed per bot over a run. """
+    def __init__(self):
+        self.totals = {}    # Player name -> dict of summed statistics
+
+    def add(self, searches):
+        """ Adds the (player name, SearchStats.as_dict()) pairs of a game, as returned by play_game. """
+        for name, stats in searches:
+            totals = self.totals.setdefault(name, dict(searches=0, iterations=0, playouts=0, seconds=0., nodes=0,
+                                                       max_depth=0, total_depth=0, transposition_lookups=0,
+                                                       transposition_hits=0,
+                                                       phase_seconds=dict.fromkeys(SearchStats.phases, 0.)))
+            totals['searches'] += 1
+            for key in ('iterations', 'playouts', 'seconds', 'nodes', 'total_depth', 'transposition_lookups',
+                        'transposition_hits'):
+                totals[key] += stats[key]
+            totals['max_depth'] = max(totals['max_depth'], stats['max_depth'])
+            for phase, seconds in stats['phase_seconds'].items():
+                totals['phase_seconds'][phase] += seconds
+
+    def report(self):
+        """ Prints per bot the average iterations and nodes per search, playouts per second, leaf depths, the hit
+        rate of transposition table lookups ("-" for bots without a table), and the share of each phase in the
+        measured search time.
+        """
+        if not self.totals:
+            return
+        print("")
+        print("Searches:")
+        print("%-20s %8s %10s %12s %10s %13s %7s  %s" % ("player", "searches", "iterations", "playouts/s", "nodes",
+                                                          "depth avg/max", "tt hits", " / ".join(SearchStats.phases)))
+        for name, totals in sorted(self.totals.items()):
+            searches, iterations = totals['searches'], totals['iterations']
+            lookups = totals['transposition_lookups']
+            hits = "%.1f%%" % (100 * totals['transposition_hits'] / lookups) if lookups else "-"
+            phase_total = sum(totals['phase_seconds'].values())
+            shares = " / ".join("%.0f%%" % (100 * totals['phase_seconds'][phase] / phase_total if phase_total else 0)
+                                for phase in SearchStats.phases)
+            print("%-20s %8d %10.0f %12.0f %10.0f %7.1f/%-5d %7s  %s" %
+                  (name, searches, iterations / searches,
+                   totals['playouts'] / totals['seconds'] if totals['seconds'] else 0., totals['nodes'] / searches,
+                   totals['total_depth'] / iterations if iterations else 0., totals['max_depth'], hits, shares))
+
+
+def expected_score(elo):
+    """ The expected score (a win counting 1 and a draw 1/2) of a player elo Elo stronger than its opponent. """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def log_likelihood(record, score):
+    """ Returns the log likelihood of record (wins, draws, losses) under the likeliest win, draw and loss
+    probabilities whose expected score is score, leaving out a term that does not depend on score.
+
+    Those probabilities are the record's frequencies f, reweighted as f / (1 + m * (v - score)) for the outcome's value
+    v (1, 1/2 or 0), with the multiplier m that makes them sum to 1. It is found by bisection, as their sum decreases
+    with m. Half a game of each outcome is added to the frequencies, so that a one-sided record still fits a score
+    inside (0, 1).
+    """
+    games = sum(record) + 1.5
+    frequencies = [(count + 0.5) / games for count in record]
+    deviations = [value - score for value in (1., 0.5, 0.)]
+    low, high = -1 / (1 - score), 1 / score
+    for _ in range(60):
+        multiplier = (low + high) / 2
+        if sum(f * d / (1 + multiplier * d) for f, d in zip(frequencies, deviations)) > 0:
+            low = multiplier
+        else:
+            high = multiplier
+    multiplier = (low + high) / 2
+    return -sum(count * math.log(1 + multiplier * d) for count, d in zip(record, deviations))
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """ Returns the log likelihood ratio of "the player is elo1 Elo stronger" over "it is elo0 Elo stronger", given
+    its record: the generalized SPRT of chess engine testing, which compares the likeliest trinomial outcome
+    probabilities under either hypothesis (see log_likelihood).
+    """
+    record = (wins, draws, losses)
+    return log_likelihood(record, expected_score(elo1)) - log_likelihood(record, expected_score(elo0))
+
+
+def sprt_bounds(alpha, beta):
+    """ The LLR below which the SPRT accepts H0 and above which it accepts H1. """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt(p1, p2, elo0, elo1, alpha, beta, max_games, workers, seed, move_times, search_totals, profile):
+    """ Plays p1 against p2 until a sequential probability ratio test accepts either H0 (p1 is elo0 Elo stronger than
+    p2) or H1 (p1 is elo1 Elo stronger), or max_games have been played. Games are played over a pool of worker
+    processes, p1 and p2 taking turns to move first, and the test is updated as each one ends.
+
+    Args:
+        p1:         The name of the player under test.
+        p2:         The name of its opponent.
+        elo0:       The Elo difference of H0.
+        elo1:       The Elo difference of H1, above elo0.
+        alpha:      The probability of accepting H1 when H0 holds.
+        beta:       The probability of accepting H0 when H1 holds.
+        max_games:  The most games to play.
+        workers:    The number of worker processes.
+        seed:       The seed of the first game; game i is played with seed + i.
+        move_times: The MoveTimes to record the moves' times in.
+        search_totals: The SearchTotals to add the search statistics to.
+        profile:    The mcts_profile.Profile to merge the games' profiles into, or None.
+
+    Returns:        'H0', 'H1', or None if max_games ran out first.
+
+    """
+    lower, upper = sprt_bounds(alpha, beta)
+    record = [0, 0, 0]      # Wins, draws and losses of p1
+
+    print("SPRT of %s against %s: H0 elo %g, H1 elo %g, alpha %g, beta %g; LLR bounds (%.2f, %.2f)" %
+          (p1, p2, elo0, elo1, alpha, beta, lower, upper))
+    decision = None
+    results = run_games(schedule([p1, p2], max_games), workers, seed, profiling(profile))
+    for done, (i, first, second, winner, final_score, moves, searches, game_profile) in enumerate(results, 1):
+        move_times.add(i, moves)
+        search_totals.add(searches)
+        if profile is not None:
+            profile.merge(game_profile)
+        if winner == 'draw':
+            result = "draw"
+            record[1] += 1
+        else:
+            result = (first, second)[winner - 1] + " wins"
+            record[0 if (first, second)[winner - 1] == p1 else 2] += 1
+        llr = sprt_llr(record[0], record[1], record[2], elo0, elo1)
+        print("[%d] game %d: %s vs %s: %s  W-D-L %d-%d-%d  LLR %.2f" %
+              ((done, i, first, second, result) + tuple(record) + (llr,)), flush=True)
+        if llr <= lower:
+            decision = 'H0'
+        elif llr >= upper:
+            decision = 'H1'
+        if decision:
+            break
+    results.close()
+
+    wins, draws, losses = record
+    games = wins + draws + losses
+    score = (wins + 0.5 * draws) / games
+    elo = -400 * math.log10(1 / score - 1) if 0 < score < 1 else math.copysign(float('inf'), score - 0.5)
+    print("")
+    print("%s after %d games (W-D-L %d-%d-%d, score %.3f, %+.0f Elo)" %
+          ({'H0': "H0 accepted", 'H1': "H1 accepted", None: "No decision"}[decision], games, wins, draws, losses,
+           score, elo))
+    return decision
+
+
+def match(p1, p2, rounds, move_times, search_totals, profile):
+    """ Plays rounds games of p1 against p2 in this process, p1 always moving first, recording the times of the moves
+    in the MoveTimes move_times, the search statistics in the SearchTotals search_totals and the games' profiles in
+    the mcts_profile.Profile profile if it is set.
+    """
+    wins = {'draw': 0, 1: 0, 2: 0}
+    for i in range(rounds):
+
+        print("")
+        print("Round %d, fight!" % i)
+
+        winner, final_score, moves, searches, game_profile = play_game(p1, p2, profile=profiling(profile))
+        move_times.add(i, moves)
+        search_totals.add(searches)
+        if profile is not None:
+            profile.merge(game_profile)
+        print("Finished!")
+        print()
+        print("The %s bot wins this round! (%s)" % (winner, str(final_score)))
+        wins[winner] = wins.get(winner, 0) + 1
+
+    print("")
+    print("Final win counts:", dict(wins))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plays bots against each other.")
+    parser.add_argument('players', nargs='*', metavar='player', help="Bots to play: " + ", ".join(players))
+    parser.add_argument('--rounds', type=int, default=100, help="Games of a two-player match (default 100)")
+    parser.add_argument('--tournament', action='store_true',
+                        help="Play a round robin in parallel instead of a match")
+    parser.add_argument('--games-per-pair', type=int, default=100,
+                        help="Tournament games between each pair of players (default 100)")
+    parser.add_argument('--sprt', action='store_true',
+                        help="Play p1 against p2 in parallel until a sequential probability ratio test decides")
+    parser.add_argument('--elo0', type=float, default=0., help="SPRT: Elo difference of H0 (default 0)")
+    parser.add_argument('--elo1', type=float, default=20., help="SPRT: Elo difference of H1 (default 20)")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT: false positive rate (default 0.05)")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT: false negative rate (default 0.05)")
+    parser.add_argument('--max-games', type=int, default=10000, help="SPRT: most games to play (default 10000)")
+    parser.add_argument('--move-times', metavar='FILE',
+                        help="Write the time of every move to FILE (CSV, or JSON lines if it ends in .jsonl)")
+    parser.add_argument('--profile', action='store_true',
+                        default=os.environ.get('MCTS_PROFILE', '') not in ('', '0'),
+                        help="Profile the MCTS bots (default: on if MCTS_PROFILE is set and not 0)")
+    parser.add_argument('--profile-sample', type=float, metavar='MS', default=os.environ.get('MCTS_PROFILE_SAMPLE'),
+                        help="Also sample the call stack every MS milliseconds (default: MCTS_PROFILE_SAMPLE)")
+    parser.add_argument('--profile-out', metavar='FILE', default='mcts_profile.collapsed',
+                        help="Collapsed stack file of the samples (default mcts_profile.collapsed)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Tournament and SPRT worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed of the first tournament or SPRT game; game i uses seed + i (default random)")
+    args = parser.parse_args()
+    for name in args.players:
+        if name not in players:
+            parser.error("%s not in %s" % (name, ",".join(players)))
+
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+
+    move_times = MoveTimes()
+    search_totals = SearchTotals()
+    profile = None
+    if args.profile or args.profile_sample:
+        profile = mcts_profile.Profile(args.profile_sample / 1000 if args.profile_sample else None)
+
+    start = time()  # To log how much time the simulation takes.
+    if args.tournament:
+        names = args.players or list(players)
+        if len(names) < 2:
+            parser.error("A tournament needs at least two players")
+        tournament(names, args.games_per_pair, args.workers, seed, move_times, search_totals, profile)
+    elif args.sprt:
+        if len(args.players) != 2:
+            parser.error("Need two player arguments")
+        if not args.elo0 < args.elo1:
+            parser.error("elo0 must be below elo1")
+        sprt(args.players[0], args.players[1], args.elo0, args.elo1, args.alpha, args.beta, args.max_games,
+             args.workers, seed, move_times, search_totals, profile)
+    else:
+        if len(args.players) != 2:
+            parser.error("Need two player arguments")
+        match(args.players[0], args.players[1], args.rounds, move_times, search_totals, profile)
 
-print("")
-print("Final win counts:", dict(wins))
+    move_times.report()
+    search_totals.report()
+    if profile is not None:
+        profile.report()
+        if profile.stacks:
+            profile.write_collapsed(args.profile_out)
+            print("Sampled stacks written to", args.profile_out)
+    if args.move_times:
+        move_times.write(args.move_times)
 
-# Also output the time elapsed.
-end = time()
-print(end - start, ' seconds')
+    # Also output the time elapsed.
+    end = time()
+    print(end - start, ' seconds')
@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import random
+
 num_players = 2
 
 positions = dict(
@@ -30,17 +32,85 @@ inv_positions = dict(
     (v, P) for P, v in positions.items()
 )
 
+wins = [
+    positions[(r, 0)] | positions[(r, 1)] | positions[(r, 2)]
+    for r in range(3)
+] + [
+    positions[(0, c)] | positions[(1, c)] | positions[(2, c)]
+    for c in range(3)
+] + [
+    positions[(0, 0)] | positions[(1, 1)] | positions[(2, 2)],
+    positions[(0, 2)] | positions[(1, 1)] | positions[(2, 0)],
+]
+
+# Lookup tables indexed by a 9-bit board mask, so that checking a
+# sub-board (or the macro board) costs a single index instead of a
+# scan over every winning line.
+won_boards = tuple(
+    any(mask & w == w for w in wins) for mask in range(512)
+)
+
+full_boards = tuple(
+    mask == 0x1ff for mask in range(512)
+)
+
+# Moves as bit indices 9 * (3 * R + C) + (3 * r + c) of an 81-bit mask
+# (see Board.legal_moves_mask), and the action tuple for each index.
+move_actions = tuple(
+    (R, C, r, c)
+    for R in range(3)
+    for C in range(3)
+    for r in range(3)
+    for c in range(3)
+)
+
+
+def iter_moves(mask):
+    """ Yields the bit index of every move set in a move mask, lowest first. """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def random_move(mask, rng=random):
+    """ Returns the bit index of a uniformly chosen move set in a non-empty
+    move mask.  Draws from rng exactly like rng.choice on the move list.
+    """
+    for _ in range(rng.randrange(mask.bit_count())):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+# The constraint of a state as a sub-board index (3 * R + C), or this
+# value when the next move may go in any sub-board.
+NO_CONSTRAINT = 9
+
+
+# Zobrist keys, generated from a fixed seed so that every process agrees on
+# them.  Each of the 20 nine-bit masks of the state has a random key per bit,
+# and zobrist_masks[i][mask] is the xor of the keys of the bits set in mask.
+# There is also one key per constraint (NO_CONSTRAINT included) and one that
+# is xored in when player 2 is to move.
+_zobrist_random = random.Random(0x2f7a3e91)
+
+
+def _zobrist_table():
+    keys = [_zobrist_random.getrandbits(64) for _ in range(9)]
+    table = [0] * 512
+    for mask in range(1, 512):
+        low = mask & -mask
+        table[mask] = table[mask ^ low] ^ keys[low.bit_length() - 1]
+    return tuple(table)
+
+
+zobrist_masks = tuple(_zobrist_table() for _ in range(20))
+zobrist_constraints = tuple(_zobrist_random.getrandbits(64) for _ in range(10))
+zobrist_player = _zobrist_random.getrandbits(64)
+
+
 class Board(object):
-    wins = [
-        positions[(r, 0)] | positions[(r, 1)] | positions[(r, 2)]
-        for r in range(3)
-    ] + [
-        positions[(0, c)] | positions[(1, c)] | positions[(2, c)]
-        for c in range(3)
-    ] + [
-        positions[(0, 0)] | positions[(1, 1)] | positions[(2, 2)],
-        positions[(0, 2)] | positions[(1, 1)] | positions[(2, 0)],
-    ]
+    wins = wins
 
     def starting_state(self):
         # Each of the 9 pairs of player 1 and player 2 board bitmasks
@@ -194,10 +264,9 @@ class Board(object):
         state[board_index + player_index] |= positions[(r, c)]
         updated_board = state[board_index + player_index]
 
-        full = (state[board_index] | state[board_index + 1] == 0x1ff)
-        if any(updated_board & w == w for w in self.wins):
+        if won_boards[updated_board]:
             state[18 + player_index] |= positions[(R, C)]
-        elif full:
+        elif full_boards[state[board_index] | state[board_index + 1]]:
             state[18] |= positions[(R, C)]
             state[19] |= positions[(R, C)]
 
@@ -238,28 +307,67 @@ class Board(object):
         # Otherwise, we must play in the proper sub-board.
         return (R, C) == (state[20], state[21])
 
-    def legal_actions(self, state):
-        R, C = state[20], state[21]
-        Rset, Cset = (R,), (C,)
-        if R is None:
-            Rset, Cset = range(3), range(3)
-
-        occupied = [
-            state[2 * x] | state[2 * x + 1] for x in range(9)
-        ]
+    def legal_moves_mask(self, state):
+        # The empty squares of every playable sub-board, with sub-board
+        # x at bits 9 * x to 9 * x + 8.
         finished = state[18] | state[19]
 
-        actions = [
-            (R, C, r, c)
-            for R in Rset
-            for C in Cset
-            for r in range(3)
-            for c in range(3)
-            if not occupied[3 * R + C] & positions[(r, c)]
-            and not finished & positions[(R, C)]
-        ]
+        if state[20] is not None:
+            x = 3 * state[20] + state[21]
+            if finished & (1 << x):
+                return 0
+            return (~(state[2 * x] | state[2 * x + 1]) & 0x1ff) << (9 * x)
 
-        return actions
+        return self.open_cells_mask(state)
+
+    def open_cells_mask(self, state):
+        # The empty squares of every unfinished sub-board, whatever the
+        # constraint: every square that can still be played this game.
+        finished = state[18] | state[19]
+        mask = 0
+        for x in range(9):
+            if not finished & (1 << x):
+                mask |= (~(state[2 * x] | state[2 * x + 1]) & 0x1ff) << (9 * x)
+        return mask
+
+    def legal_actions(self, state):
+        return [move_actions[i] for i in iter_moves(self.legal_moves_mask(state))]
+
+    def hash(self, state):
+        # The Zobrist hash of the state, computed from scratch.
+        constraint = NO_CONSTRAINT
+        if state[20] is not None:
+            constraint = 3 * state[20] + state[21]
+
+        h = zobrist_constraints[constraint]
+        if state[22] == 2:
+            h ^= zobrist_player
+        for i in range(20):
+            h ^= zobrist_masks[i][state[i]]
+        return h
+
+    def next_state_hashed(self, state, action, h):
+        # next_state for a state whose Zobrist hash is h, also returning
+        # the hash of the new state.  Only the mover's sub-board mask, the
+        # macro board, the constraint and the player can change, so only
+        # their keys are swapped.
+        R, C, r, c = action
+        new_state = self.next_state(state, action)
+
+        i = 2 * (3 * R + C) + state[-1] - 1
+        for j in (i, 18, 19):
+            h ^= zobrist_masks[j][state[j]] ^ zobrist_masks[j][new_state[j]]
+
+        old_constraint = NO_CONSTRAINT
+        if state[20] is not None:
+            old_constraint = 3 * state[20] + state[21]
+        new_constraint = NO_CONSTRAINT
+        if new_state[20] is not None:
+            new_constraint = 3 * r + c
+
+        h ^= (zobrist_constraints[old_constraint] ^
+              zobrist_constraints[new_constraint] ^ zobrist_player)
+        return new_state, h
 
     def previous_player(self, state):
         return 3 - state[-1]
@@ -271,14 +379,8 @@ class Board(object):
         p1 = state[18] & ~state[19]
         p2 = state[19] & ~state[18]
 
-        if any(w & p1 == w for w in self.wins):
-            return True
-        if any(w & p2 == w for w in self.wins):
-            return True
-        if state[18] | state[19] == 0x1ff:
-            return True
-
-        return False
+        return (won_boards[p1] or won_boards[p2] or
+                full_boards[state[18] | state[19]])
 
     def win_values(self, state):
         if not self.is_ended(state):
@@ -286,11 +388,11 @@ class Board(object):
         p1 = state[18] & ~state[19]
         p2 = state[19] & ~state[18]
 
-        if any(w & p1 == w for w in self.wins):
+        if won_boards[p1]:
             return {1: 1, 2: 0}
-        if any(w & p2 == w for w in self.wins):
+        if won_boards[p2]:
             return {1: 0, 2: 1}
-        if state[18] | state[19] == 0x1ff:
+        if full_boards[state[18] | state[19]]:
             return {1: 0.5, 2: 0.5}
 
     def owned_boxes(self, state):
@@ -313,11 +415,11 @@ class Board(object):
         p1 = state[18] & ~state[19]
         p2 = state[19] & ~state[18]
 
-        if any(w & p1 == w for w in self.wins):
+        if won_boards[p1]:
             return {1: 1, 2: -1}
-        if any(w & p2 == w for w in self.wins):
+        if won_boards[p2]:
             return {1: -1, 2: 1}
-        if state[18] | state[19] == 0x1ff:
+        if full_boards[state[18] | state[19]]:
             return {1: 0, 2: 0}
 
     def winner_message(self, winners):
@@ -1,8 +1,12 @@
-import random
+from p2_t3 import move_actions, random_move
+from rollout_rng import RolloutRNG
 
 ROLLOUTS = 10
 MAX_DEPTH = 5
 
+# The bot's random numbers; rng.seed(n) makes its choices repeatable.
+rng = RolloutRNG()
+
 
 def think(board, state):
     """ For each possible move, this bot plays ROLLOUTS random games to depth MAX_DEPTH then averages the
@@ -44,7 +48,7 @@ def think(board, state):
             for i in range(MAX_DEPTH):
                 if board.is_ended(rollout_state):
                     break
-                rollout_move = random.choice(board.legal_actions(rollout_state))
+                rollout_move = move_actions[random_move(board.legal_moves_mask(rollout_state), rng)]
                 rollout_state = board.next_state(rollout_state, rollout_move)
 
             total_score += outcome(board.owned_boxes(rollout_state),
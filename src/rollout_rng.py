@@ -0,0 +1,60 @@
+import random as _random
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RolloutRNG(object):
+    """ A seedable source of random numbers for rollouts, offering the random() and randrange(n) calls of the random
+    module (so it can be passed to p2_t3.random_move).
+
+    Numbers are drawn in bulk into buffers, and random() is the C-level __next__ of an iterator over them, so a draw
+    costs no Python frame. The buffers are filled by a NumPy Generator when NumPy is installed, and by a random.Random
+    otherwise; either way it is available as generator.
+
+    """
+    def __init__(self, seed=None, buffer_size=4096):
+        """
+        Args:
+            seed:           The seed, or None to seed from the operating system.
+            buffer_size:    The number of values drawn at a time.
+
+        """
+        self.buffer_size = buffer_size
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """ Restarts the sequence from seed (None seeds from the operating system). """
+        if np is not None:
+            self.generator = np.random.default_rng(seed)
+        else:
+            self.generator = _random.Random(seed)
+        # random() returns a float in [0, 1)
+        self.random = chain.from_iterable(self.buffers()).__next__
+
+    def buffers(self):
+        """ Yields buffers of buffer_size floats in [0, 1), forever. """
+        while True:
+            if np is not None:
+                yield self.generator.random(self.buffer_size).tolist()
+            else:
+                yield [self.generator.random() for _ in range(self.buffer_size)]
+
+    def randrange(self, n):
+        """ Returns an int in [0, n). """
+        return int(self.random() * n)
+
+    def spawn_seed(self):
+        """ Returns a seed for another RolloutRNG (e.g. a worker's) drawn from this one. """
+        return self.randrange(1 << 53)
+
+    def __getstate__(self):
+        # The iterator behind random() cannot be pickled; a copy carries on from the generator's state.
+        return dict(buffer_size=self.buffer_size, generator=self.generator)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.random = chain.from_iterable(self.buffers()).__next__
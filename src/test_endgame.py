@@ -0,0 +1,60 @@
+import random
+from functools import lru_cache
+import p2_t3
+from endgame import EndgameSolver
+from mcts_engine import MCTSEngine
+
+board = p2_t3.Board()
+
+
+@lru_cache(maxsize=None)
+def minimax(state):
+    """ The value of state for the player to move, by plain minimax over every line. """
+    if board.is_ended(state):
+        return board.points_values(state)[board.current_player(state)]
+    return max(-minimax(board.next_state(state, action)) for action in board.legal_actions(state))
+
+
+def endgame_positions(count, threshold, seed=0):
+    """ Returns count unfinished states from random games, each with at most threshold open cells. """
+    rng = random.Random(seed)
+    solver = EndgameSolver(threshold)
+    positions = []
+    while len(positions) < count:
+        state = board.starting_state()
+        while not board.is_ended(state) and not solver.applies(board, state):
+            state = board.next_state(state, rng.choice(board.legal_actions(state)))
+        for _ in range(rng.randrange(3)):
+            if board.is_ended(state):
+                break
+            state = board.next_state(state, rng.choice(board.legal_actions(state)))
+        if not board.is_ended(state):
+            positions.append(state)
+    return positions
+
+
+def test_solver_matches_minimax():
+    solver = EndgameSolver(threshold=9, max_positions=10 ** 7)
+    for state in endgame_positions(300, 9):
+        assert solver.solve(board, state) == minimax(state)
+
+
+def test_solver_gives_up_past_max_positions():
+    solver = EndgameSolver(threshold=81, max_positions=10)
+    assert solver.solve(board, board.starting_state()) is None
+    assert solver.abandoned == 1
+
+
+def test_proven_search_results_match_solver():
+    # MCTS-Solver proofs, from terminal leaves alone and with the endgame solver, against the exact values
+    solver = EndgameSolver(threshold=81, max_positions=10 ** 7)
+    proven = 0
+    for i, state in enumerate(endgame_positions(60, 14, seed=1)):
+        engine = MCTSEngine(num_nodes=400, seed=i, endgame_threshold=8 if i % 2 else 0)
+        root_node = engine.search(board, state)
+        if root_node.proven is not None:
+            proven += 1
+            assert root_node.proven == solver.solve(board, state)
+            if root_node.proven > 0:
+                assert -solver.solve(board, board.next_state(state, engine.think(board, state))) == 1
+    assert proven
@@ -0,0 +1,38 @@
+import random
+from p2_sim import sprt_bounds, sprt_llr
+
+
+def sprt_false_positives(elo0, elo1, trials, draw_rate=0.2, alpha=0.05, beta=0.05, max_games=2000, seed=0):
+    """ Runs trials SPRTs between two equally strong players and returns the share of them that accepted H1. """
+    rng = random.Random(seed)
+    lower, upper = sprt_bounds(alpha, beta)
+    accepted = 0
+    for _ in range(trials):
+        record = [0, 0, 0]
+        for _ in range(max_games):
+            x = rng.random()
+            record[0 if x < (1 - draw_rate) / 2 else 1 if x < (1 + draw_rate) / 2 else 2] += 1
+            llr = sprt_llr(record[0], record[1], record[2], elo0, elo1)
+            if llr >= upper:
+                accepted += 1
+                break
+            if llr <= lower:
+                break
+    return accepted / trials
+
+
+def test_sprt_llr_sign():
+    assert sprt_llr(0, 0, 0, 0, 20) == 0
+    assert sprt_llr(60, 20, 20, 0, 20) > 0
+    assert sprt_llr(20, 20, 60, 0, 20) < 0
+
+
+def test_sprt_needs_more_than_a_few_games():
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert sprt_llr(5, 0, 0, 0, 20) < upper
+    assert sprt_llr(5, 0, 0, 0, 100) < upper
+
+
+def test_sprt_false_positive_rate():
+    # wide bounds end quickly, and were where the normal approximation used to stop too early
+    assert sprt_false_positives(0, 100, trials=1000) <= 0.06
@@ -0,0 +1,42 @@
+import random
+import p2_t3
+
+board = p2_t3.Board()
+
+
+def random_games(games, seed=0):
+    """ Yields the (state, action) pairs of games random games, action being None at the end of each game. """
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = board.starting_state()
+        while not board.is_ended(state):
+            action = rng.choice(board.legal_actions(state))
+            yield state, action
+            state = board.next_state(state, action)
+        yield state, None
+
+
+def test_next_state_hashed_matches_hash():
+    h = None
+    for state, action in random_games(300):
+        if h is None:
+            h = board.hash(state)
+        assert h == board.hash(state)
+        if action is None:
+            h = None
+        else:
+            next_state, h = board.next_state_hashed(state, action, h)
+            assert next_state == board.next_state(state, action)
+
+
+def test_hash_tells_states_apart():
+    hashes = {}
+    for state, action in random_games(100, seed=1):
+        assert hashes.setdefault(board.hash(state), state) == state
+
+
+def test_legal_moves_mask_matches_legal_actions():
+    for state, action in random_games(100, seed=2):
+        moves = board.legal_moves_mask(state)
+        assert sorted(p2_t3.move_actions[move] for move in p2_t3.iter_moves(moves)) == \
+            sorted(board.legal_actions(state))